@@ -0,0 +1,67 @@
+"""Measure cold-start import time of `llm_factory` and of each provider SDK it loads lazily.
+
+Every sample runs in a fresh interpreter so nothing is cached between measurements:
+
+    python benchmarks/llm_factory_startup.py --runs 5 --max-import-ms 150
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+PROVIDERS = ["openai", "anthropic", "ollama"]
+
+SAMPLE_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import llm_factory
+imported = time.perf_counter()
+provider = sys.argv[1]
+if provider != "none":
+    llm_factory.preload_provider(provider)
+print(json.dumps({"module": imported - start, "provider": time.perf_counter() - imported}))
+"""
+
+
+def sample(provider: str) -> dict[str, float]:
+    result = subprocess.run(
+        [sys.executable, "-c", SAMPLE_SCRIPT, provider],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per measurement")
+    parser.add_argument("--max-import-ms", type=float, help="fail if importing llm_factory alone exceeds this")
+    args = parser.parse_args()
+
+    print(f"{'measurement':<24}{'median ms':>12}{'min ms':>10}")
+    module_times = []
+    for provider in ["none", *PROVIDERS]:
+        samples = [sample(provider) for _ in range(args.runs)]
+        module_times.extend(s["module"] for s in samples)
+        if provider != "none":
+            provider_times = [s["provider"] * 1000 for s in samples]
+            label = f"+ {provider} SDK"
+            print(f"{label:<24}{statistics.median(provider_times):>12.1f}{min(provider_times):>10.1f}")
+
+    module_ms = [t * 1000 for t in module_times]
+    print(f"{'import llm_factory':<24}{statistics.median(module_ms):>12.1f}{min(module_ms):>10.1f}")
+
+    if args.max_import_ms is not None and statistics.median(module_ms) > args.max_import_ms:
+        print(f"Regression: importing llm_factory takes more than {args.max_import_ms} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
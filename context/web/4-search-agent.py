@@ -69,7 +69,7 @@ def ask_agent(query: str) -> AgentAnswer:
             if name == "get_web_page":
                 print(f"  Retrieved {len(result)} characters")
             elif name == "search_handbook":
-                print(f"  Handbook retrieved ({len(result)} chars)")
+                print(f"  Handbook sections retrieved ({len(result)} chars)")
 
             input_messages.append(
                 {
@@ -94,7 +94,7 @@ class SearchAgent:
                 if name == "get_web_page":
                     self._log(f"  Retrieved {len(result)} characters")
                 elif name == "search_handbook":
-                    self._log(f"  Handbook retrieved ({len(result)} chars)")
+                    self._log(f"  Handbook sections retrieved ({len(result)} chars)")
 
                 input_messages.append(
                     {
@@ -1,32 +1,238 @@
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Callable, List, Optional, Sequence
 
 HANDBOOK_PATH = Path(__file__).parent.parent / "data" / "handbook.md"
 
+# Token budget of one tool result; about 4 characters per token for English text
+MAX_TOKENS = 800
+MAX_SECTIONS = 4
+CHARS_PER_TOKEN = 4
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*$")
+_SECTION_NUMBER = re.compile(r"^(\d+(?:\.\d+)*)\.?\s+(.*)$")
+# Words, keeping dotted section numbers such as "2.1" together
+_TOKEN = re.compile(r"\w+(?:\.\w+)*")
+# Question words dominate BM25 on a corpus this small, so they are not indexed
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it must of on or should that "
+    "the this to was we what when where which who why with".split()
+)
+
+
+def terms(text: str) -> List[str]:
+    return [term for term in _TOKEN.findall(text.lower()) if term not in STOPWORDS]
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+@dataclass
+class Section:
+    id: str
+    title: str
+    level: int
+    body: str
+    parent: Optional["Section"] = None
+    children: List["Section"] = field(default_factory=list)
+
+    @property
+    def path(self) -> List[str]:
+        """Headings from the top-level section down to this one."""
+        parent_path = self.parent.path if self.parent else []
+        return [*parent_path, self.heading]
+
+    @property
+    def heading(self) -> str:
+        return f"{self.id} {self.title}" if self.id != self.title else self.title
+
+    def render(self) -> str:
+        context = f" (in {' > '.join(self.parent.path)})" if self.parent else ""
+        return f"[Section {self.id}] {self.title}{context}\n{self.body}".rstrip()
+
+
+def parse_sections(markdown: str) -> List[Section]:
+    """Split markdown into sections at `##` and deeper headings, in document order.
+
+    Sections are keyed by their heading number ("2.1") or, if unnumbered, by their title.
+    The `#` document title is skipped; each section's parent is the nearest shallower one.
+    """
+    sections: List[Section] = []
+    stack: List[Section] = []
+    lines: List[str] = []
+
+    def close():
+        if sections:
+            sections[-1].body = "\n".join(lines).strip()
+        lines.clear()
+
+    for line in markdown.splitlines():
+        match = _HEADING.match(line)
+        if not match or len(match.group(1)) == 1:
+            if sections:
+                lines.append(line)
+            continue
+        close()
+        level, heading = len(match.group(1)), match.group(2)
+        numbered = _SECTION_NUMBER.match(heading)
+        section_id, title = numbered.groups() if numbered else (heading, heading)
+        while stack and stack[-1].level >= level:
+            stack.pop()
+        section = Section(
+            id=section_id, title=title, level=level, body="", parent=stack[-1] if stack else None
+        )
+        if section.parent:
+            section.parent.children.append(section)
+        sections.append(section)
+        stack.append(section)
+    close()
+    return sections
+
+
+class HandbookIndex:
+    """BM25 index over handbook sections, optionally blended with embedding similarity.
+
+    Each section is indexed with its heading path, its own heading counted twice, so a query
+    for "IAMA" or "2.1" ranks the section it names above sections that only mention it.
+    With `embed`, section vectors are computed once and the min-max normalized cosine
+    similarity is added to the normalized BM25 score.
+
+    Args:
+        sections: Sections to index, in document order
+        embed: Optional function returning one vector per input text
+        k1: BM25 term frequency saturation
+        b: BM25 length normalization
+    """
+
+    def __init__(
+        self,
+        sections: Sequence[Section],
+        embed: Optional[Callable[[List[str]], List[List[float]]]] = None,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ):
+        self.sections = list(sections)
+        self.by_id = {section.id: section for section in self.sections}
+        self.embed = embed
+        self.k1 = k1
+        self.b = b
+
+        documents = [terms(" ".join([*s.path, s.heading, s.body])) for s in self.sections]
+        self.term_counts = [Counter(document) for document in documents]
+        self.lengths = [len(document) for document in documents]
+        self.average_length = max(sum(self.lengths) / max(len(self.lengths), 1), 1.0)
+        df = Counter(term for counts in self.term_counts for term in counts)
+        self.idf = {
+            term: math.log1p((len(self.sections) - n + 0.5) / (n + 0.5)) for term, n in df.items()
+        }
+        self.vectors = (
+            embed([section.render() for section in self.sections]) if embed else None
+        )
+
+    @classmethod
+    def from_file(cls, path: Path = HANDBOOK_PATH, **kwargs) -> "HandbookIndex":
+        text = path.read_text(encoding="utf-8") if path.exists() else ""
+        return cls(parse_sections(text), **kwargs)
+
+    def bm25(self, query: str) -> List[float]:
+        query_terms = [term for term in dict.fromkeys(terms(query)) if term in self.idf]
+        scores = []
+        for counts, length in zip(self.term_counts, self.lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / self.average_length)
+            scores.append(
+                sum(
+                    self.idf[term] * counts[term] * (self.k1 + 1) / (counts[term] + norm)
+                    for term in query_terms
+                )
+            )
+        return scores
+
+    def scores(self, query: str) -> List[float]:
+        scores = _min_max(self.bm25(query))
+        if self.vectors is not None:
+            query_vector = self.embed([query])[0]
+            similarity = _min_max([_cosine(query_vector, vector) for vector in self.vectors])
+            scores = [bm25 + cosine for bm25, cosine in zip(scores, similarity)]
+        return scores
+
+    def search(
+        self, query: str, max_tokens: int = MAX_TOKENS, max_sections: int = MAX_SECTIONS
+    ) -> List[Section]:
+        """Up to `max_sections` best matches, best first, whose text fits within `max_tokens`.
+
+        Sections that would overflow the budget are skipped in favour of smaller ones, but
+        the best match is always returned. Sections with no match are never returned, and
+        neither are headings without text of their own; their subsections carry the heading
+        in their path, so they match instead.
+        """
+        scores = self.scores(query)
+        ranked = sorted(
+            (i for i, score in enumerate(scores) if score > 0 and self.sections[i].body),
+            key=lambda i: -scores[i],
+        )
+        selected, used = [], 0
+        for i in ranked:
+            if len(selected) == max_sections:
+                break
+            tokens = estimate_tokens(self.sections[i].render())
+            if used + tokens <= max_tokens or not selected:
+                selected.append(self.sections[i])
+                used += tokens
+        return selected
+
+    def outline(self) -> str:
+        return "\n".join(f"{'  ' * (s.level - 2)}{s.heading}" for s in self.sections)
+
+
+def _min_max(values: List[float]) -> List[float]:
+    if not values:
+        return []
+    low, high = min(values), max(values)
+    if high <= low:
+        return [1.0 if value > 0 else 0.0 for value in values]
+    return [(value - low) / (high - low) for value in values]
+
+
+def _cosine(a: Sequence[float], b: Sequence[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+# Parsed and indexed once per process; every tool call only scores the query
+HANDBOOK = HandbookIndex.from_file()
+
 
 def search_handbook(query: str) -> str:
-    """Retrieve the handbook content for the agent to interpret.
+    """Retrieve the handbook sections most relevant to the query.
 
-    Note: The query parameter is accepted but not used - we return the full handbook.
-    This simulates Retrieval Augmented Generation (RAG). In a real application with
-    large handbooks or contexts, you would implement semantic search, filtering, or
-    chunking to retrieve only relevant sections based on the query.
+    Returns the top sections within the token budget, each labelled with its section id
+    for citations. If nothing matches, returns the handbook outline so the query can be
+    rephrased with the right terms or section number.
     """
-    if not HANDBOOK_PATH.exists():
+    if not HANDBOOK.sections:
         return "Handbook not found."
-    return HANDBOOK_PATH.read_text(encoding="utf-8")
+    sections = HANDBOOK.search(query)
+    if not sections:
+        return f"No handbook sections matched the query. Available sections:\n{HANDBOOK.outline()}"
+    return "\n\n---\n\n".join(section.render() for section in sections)
 
 
 def get_tool_definition():
     return {
         "type": "function",
         "name": "search_handbook",
-        "description": "Retrieve the AI implementation handbook content. Use this when the user asks questions about AI implementation requirements, regulations, or procedures.",
+        "description": "Search the AI implementation handbook. Use this when the user asks questions about AI implementation requirements, regulations, or procedures. Returns the most relevant handbook sections, each labelled with its section number (e.g. '2.1') for citations. Search again with other terms to find more sections.",
         "parameters": {
             "type": "object",
             "properties": {
                 "query": {
                     "type": "string",
-                    "description": "The question or query - used for context, but the full handbook will be returned",
+                    "description": "Keywords or question describing the information needed, e.g. 'impact assessment requirements' or 'section 3.3'",
                 },
             },
             "required": ["query"],
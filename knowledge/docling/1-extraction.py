@@ -1,39 +1,45 @@
 from docling.document_converter import DocumentConverter
+from utils.crawl import CrawlPipeline
 from utils.sitemap import get_sitemap_urls
 
-converter = DocumentConverter()
+# The crawl below converts pages in worker processes, which import this script. Everything
+# runs under the guard so workers do not repeat the conversions when they import it.
+if __name__ == "__main__":
+    converter = DocumentConverter()
 
-# --------------------------------------------------------------
-# Basic PDF extraction
-# --------------------------------------------------------------
+    # --------------------------------------------------------------
+    # Basic PDF extraction
+    # --------------------------------------------------------------
 
-result = converter.convert("https://arxiv.org/pdf/2408.09869")
+    result = converter.convert("https://arxiv.org/pdf/2408.09869")
 
-document = result.document
-markdown_output = document.export_to_markdown()
-json_output = document.export_to_dict()
+    document = result.document
+    markdown_output = document.export_to_markdown()
+    json_output = document.export_to_dict()
 
-print(markdown_output)
+    print(markdown_output)
 
-# --------------------------------------------------------------
-# Basic HTML extraction
-# --------------------------------------------------------------
+    # --------------------------------------------------------------
+    # Basic HTML extraction
+    # --------------------------------------------------------------
 
-result = converter.convert("https://ds4sd.github.io/docling/")
+    result = converter.convert("https://ds4sd.github.io/docling/")
 
-document = result.document
-markdown_output = document.export_to_markdown()
-print(markdown_output)
+    document = result.document
+    markdown_output = document.export_to_markdown()
+    print(markdown_output)
 
-# --------------------------------------------------------------
-# Scrape multiple pages using the sitemap
-# --------------------------------------------------------------
+    # --------------------------------------------------------------
+    # Scrape multiple pages using the sitemap
+    # --------------------------------------------------------------
 
-sitemap_urls = get_sitemap_urls("https://ds4sd.github.io/docling/")
-conv_results_iter = converter.convert_all(sitemap_urls)
+    # Pages are converted in parallel worker processes and written to data/crawl as they
+    # finish. Re-running skips pages that were already converted, so a crashed crawl resumes.
+    sitemap_urls = get_sitemap_urls("https://ds4sd.github.io/docling/")
+    pipeline = CrawlPipeline(output_dir="data/crawl", max_workers=4)
 
-docs = []
-for result in conv_results_iter:
-    if result.document:
-        document = result.document
-        docs.append(document)
+    document_paths = []
+    for path in pipeline.run(sitemap_urls):
+        document_paths.append(path)
+
+    print(pipeline.stats)
@@ -2,37 +2,60 @@ from docling.chunking import HybridChunker
 from docling.document_converter import DocumentConverter
 from dotenv import load_dotenv
 from openai import OpenAI
+from utils.chunking import CorpusChunker
+from utils.conversion_cache import ConversionCache
 from utils.tokenizer import OpenAITokenizerWrapper
 
-load_dotenv()
-
-# Initialize OpenAI client (make sure you have OPENAI_API_KEY in your environment variables)
-client = OpenAI()
-
-
-tokenizer = OpenAITokenizerWrapper()  # Load our custom tokenizer for OpenAI
 MAX_TOKENS = 8191  # text-embedding-3-large's maximum context length
 
-
-# --------------------------------------------------------------
-# Extract the data
-# --------------------------------------------------------------
-
-converter = DocumentConverter()
-result = converter.convert("https://arxiv.org/pdf/2408.09869")
-
-
-# --------------------------------------------------------------
-# Apply hybrid chunking
-# --------------------------------------------------------------
-
-chunker = HybridChunker(
-    tokenizer=tokenizer,
-    max_tokens=MAX_TOKENS,
-    merge_peers=True,
-)
-
-chunk_iter = chunker.chunk(dl_doc=result.document)
-chunks = list(chunk_iter)
-
-len(chunks)
+# The corpus section chunks in worker processes, which import this script. Everything runs
+# under the guard so workers do not repeat the client setup, conversion and chunking.
+if __name__ == "__main__":
+    load_dotenv()
+
+    # Initialize OpenAI client (make sure you have OPENAI_API_KEY in your environment variables)
+    client = OpenAI()
+
+    tokenizer = OpenAITokenizerWrapper()  # Load our custom tokenizer for OpenAI
+
+    # --------------------------------------------------------------
+    # Extract the data
+    # --------------------------------------------------------------
+
+    # Converted documents are cached on disk, so re-runs skip the PDF layout analysis
+    converter = DocumentConverter()
+    conversion_cache = ConversionCache(converter)
+    document = conversion_cache.convert("https://arxiv.org/pdf/2408.09869")
+    print(conversion_cache.report())
+
+    # --------------------------------------------------------------
+    # Apply hybrid chunking
+    # --------------------------------------------------------------
+
+    chunker = HybridChunker(
+        tokenizer=tokenizer,
+        max_tokens=MAX_TOKENS,
+        merge_peers=True,
+    )
+
+    chunk_iter = chunker.chunk(dl_doc=document)
+    chunks = list(chunk_iter)
+
+    len(chunks)
+
+    # --------------------------------------------------------------
+    # Chunk a corpus in parallel
+    # --------------------------------------------------------------
+
+    # Multi-document ingests are chunked in a process pool, one chunker per worker
+    documents = [
+        conversion_cache.convert(source)
+        for source in [
+            "https://arxiv.org/pdf/2408.09869",
+            "https://ds4sd.github.io/docling/",
+        ]
+    ]
+
+    corpus_chunker = CorpusChunker(max_tokens=MAX_TOKENS, merge_peers=True)
+    corpus_chunks = corpus_chunker.chunk_all(documents)
+    print(corpus_chunker.stats)
@@ -7,7 +7,13 @@ from dotenv import load_dotenv
 from lancedb.embeddings import get_registry
 from lancedb.pydantic import LanceModel, Vector
 from openai import OpenAI
+from utils.conversion_cache import ConversionCache
+from utils.embedding import EmbeddingPipeline, OpenAIEmbedder
+from utils.embedding_cache import EmbeddingCache
+from utils.ingest import IncrementalIngest, chunk_id
+from utils.retrieval import ensure_fts_index
 from utils.tokenizer import OpenAITokenizerWrapper
+from utils.vector_index import ensure_vector_index
 
 load_dotenv()
 
@@ -23,8 +29,12 @@ MAX_TOKENS = 8191  # text-embedding-3-large's maximum context length
 # Extract the data
 # --------------------------------------------------------------
 
+# Converted documents are cached on disk, so re-runs skip the PDF layout analysis
 converter = DocumentConverter()
-result = converter.convert("https://arxiv.org/pdf/2408.09869")
+conversion_cache = ConversionCache(converter)
+source = "https://arxiv.org/pdf/2408.09869"
+document = conversion_cache.convert(source)
+print(conversion_cache.report())
 
 
 # --------------------------------------------------------------
@@ -37,7 +47,7 @@ chunker = HybridChunker(
     merge_peers=True,
 )
 
-chunk_iter = chunker.chunk(dl_doc=result.document)
+chunk_iter = chunker.chunk(dl_doc=document)
 chunks = list(chunk_iter)
 
 # --------------------------------------------------------------
@@ -66,12 +76,23 @@ class ChunkMetadata(LanceModel):
 
 # Define the main Schema
 class Chunks(LanceModel):
+    id: str
+    source: str
     text: str = func.SourceField()
     vector: Vector(func.ndims()) = func.VectorField()  # type: ignore
     metadata: ChunkMetadata
 
 
-table = db.create_table("docling", schema=Chunks, mode="overwrite")
+# The table is kept and updated incrementally instead of being overwritten on every run
+# Tables built by earlier versions of this script lack the id and source columns to sync on
+try:
+    existing_columns = set(db.open_table("docling").schema.names)
+except ValueError:  # No table yet
+    existing_columns = None
+if existing_columns is not None and not {"id", "source"} <= existing_columns:
+    print("Rebuilding the docling table, which predates incremental sync")
+    db.drop_table("docling")
+table = db.create_table("docling", schema=Chunks, exist_ok=True)
 
 # --------------------------------------------------------------
 # Prepare the chunks for the table
@@ -80,6 +101,8 @@ table = db.create_table("docling", schema=Chunks, mode="overwrite")
 # Create table with processed chunks
 processed_chunks = [
     {
+        "id": chunk_id(source, chunk.meta.headings, chunk.text),
+        "source": source,
         "text": chunk.text,
         "metadata": {
             "filename": chunk.meta.origin.filename,
@@ -101,10 +124,34 @@ processed_chunks = [
 ]
 
 # --------------------------------------------------------------
-# Add the chunks to the table (automatically embeds the text)
+# Embed new chunks and sync them into the table
 # --------------------------------------------------------------
 
-table.add(processed_chunks)
+# Duplicate texts are embedded once, and batches run concurrently with retries.
+# Swap in FakeEmbedder(ndims=func.ndims()) to run the ingest without API calls.
+embedder = OpenAIEmbedder(model_name="text-embedding-3-large", ndims=func.ndims())
+
+# Embeddings persist across runs and tables, so unchanged chunks skip the API
+embedding_cache = EmbeddingCache(embedder.model_name, embedder.ndims)
+embedding_pipeline = EmbeddingPipeline(embedder, cache=embedding_cache)
+
+# Only chunks with a new id are embedded and inserted; chunks that no longer exist are
+# deleted. Pass sources=[source] to sync one document without touching the others.
+ingest = IncrementalIngest(table, embedding_pipeline)
+print(ingest.sync(processed_chunks))
+print(embedding_pipeline.stats)
+print(embedding_cache.report())
+
+# --------------------------------------------------------------
+# Build or update the search indexes
+# --------------------------------------------------------------
+
+# Full-text indexes over the chunk text and section title, used by hybrid search
+ensure_fts_index(table)
+
+# Small tables are searched by brute force; large ones get an IVF-PQ index, and later
+# ingests fold their new rows into it
+print(f"Vector index: {ensure_vector_index(table)}")
 
 # --------------------------------------------------------------
 # Load the table
@@ -1,4 +1,6 @@
 import lancedb
+from utils.retrieval import HybridRetriever
+from utils.vector_index import SearchParams
 
 # --------------------------------------------------------------
 # Connect to the database
@@ -19,5 +21,20 @@ table = db.open_table("docling")
 # Search the table
 # --------------------------------------------------------------
 
-result = table.search(query="what's docling?", query_type="vector").limit(3)
+# nprobes/refine_factor trade recall for latency once the table has an ANN index
+# (see benchmarks/vector_index.py); they have no effect on a brute-force scan
+search_params = SearchParams(nprobes=20, refine_factor=10)
+result = search_params.apply(
+    table.search(query="what's docling?", query_type="vector")
+).limit(3)
 result.to_pandas()
+
+
+# --------------------------------------------------------------
+# Hybrid search (BM25 + vector, reciprocal-rank fusion)
+# --------------------------------------------------------------
+
+# Catches exact terms such as section numbers that pure vector search misses
+retriever = HybridRetriever(table, search_params=search_params)
+hybrid_result = retriever.search("TableFormer", limit=3)
+hybrid_result.to_pandas()
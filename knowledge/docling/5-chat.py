@@ -2,6 +2,11 @@ import streamlit as st
 import lancedb
 from openai import OpenAI
 from dotenv import load_dotenv
+from utils.embedding import OpenAIEmbedder
+from utils.query_embedding import QueryEmbedder
+from utils.context_packing import ContextPacker, PackedContext
+from utils.reranking import Reranker
+from utils.retrieval import HybridRetriever
 
 # Load environment variables
 load_dotenv()
@@ -22,40 +27,40 @@ def init_db():
     return db.open_table("docling")
 
 
-def get_context(query: str, table, num_results: int = 5) -> str:
-    """Search the database for relevant context.
+@st.cache_resource
+def init_retriever(_table):
+    """Initialize the hybrid (BM25 + vector) retriever shared by all sessions.
 
-    Args:
-        query: User's question
-        table: LanceDB table object
-        num_results: Number of results to return
+    Query embeddings are cached and concurrent queries are batched, so repeated questions
+    skip the embeddings API entirely. The top 50 fused results are reranked locally; pass
+    reranker=None to skip that stage.
 
     Returns:
-        str: Concatenated context from relevant chunks with source information
+        HybridRetriever over the table
     """
-    results = table.search(query).limit(num_results).to_pandas()
-    contexts = []
+    embedding_function = _table.embedding_functions["vector"].function
+    embedder = OpenAIEmbedder(
+        model_name=embedding_function.name, ndims=embedding_function.ndims(), client=client
+    )
+    return HybridRetriever(_table, embed_query=QueryEmbedder(embedder), reranker=Reranker())
 
-    for _, row in results.iterrows():
-        # Extract metadata
-        filename = row["metadata"]["filename"]
-        page_numbers = row["metadata"]["page_numbers"]
-        title = row["metadata"]["title"]
 
-        # Build source citation
-        source_parts = []
-        if filename:
-            source_parts.append(filename)
-        if page_numbers:
-            source_parts.append(f"p. {', '.join(str(p) for p in page_numbers)}")
+context_packer = ContextPacker(max_tokens=2000)
 
-        source = f"\nSource: {' - '.join(source_parts)}"
-        if title:
-            source += f"\nTitle: {title}"
 
-        contexts.append(f"{row['text']}{source}")
+def get_context(query: str, retriever: HybridRetriever, num_results: int = 10) -> PackedContext:
+    """Search the database for relevant context.
 
-    return "\n\n".join(contexts)
+    Args:
+        query: User's question
+        retriever: Hybrid retriever over the LanceDB table
+        num_results: Number of candidates to retrieve before packing
+
+    Returns:
+        PackedContext: The best non-overlapping chunks that fit the token budget, as typed
+            results for display and as prompt text with source information
+    """
+    return context_packer.pack(retriever.retrieve(query, limit=num_results))
 
 
 def get_chat_response(messages, context: str) -> str:
@@ -100,6 +105,7 @@ if "messages" not in st.session_state:
 
 # Initialize database connection
 table = init_db()
+retriever = init_retriever(table)
 
 # Display chat messages
 for message in st.session_state.messages:
@@ -117,7 +123,7 @@ if prompt := st.chat_input("Ask a question about the document"):
 
     # Get relevant context
     with st.status("Searching document...", expanded=False) as status:
-        context = get_context(prompt, table)
+        context = get_context(prompt, retriever)
         st.markdown(
             """
             <style>
@@ -146,18 +152,10 @@ if prompt := st.chat_input("Ask a question about the document"):
         )
 
         st.write("Found relevant sections:")
-        for chunk in context.split("\n\n"):
-            # Split into text and metadata parts
-            parts = chunk.split("\n")
-            text = parts[0]
-            metadata = {
-                line.split(": ")[0]: line.split(": ")[1]
-                for line in parts[1:]
-                if ": " in line
-            }
-
-            source = metadata.get("Source", "Unknown source")
-            title = metadata.get("Title", "Untitled section")
+        st.caption(str(context))  # Chunks and tokens kept, and what packing saved
+        for result in context.results:
+            source = result.source or "Unknown source"
+            title = result.title or "Untitled section"
 
             st.markdown(
                 f"""
@@ -165,7 +163,7 @@ if prompt := st.chat_input("Ask a question about the document"):
                     <details>
                         <summary>{source}</summary>
                         <div class="metadata">Section: {title}</div>
-                        <div style="margin-top: 8px;">{text}</div>
+                        <div style="margin-top: 8px;">{result.text}</div>
                     </details>
                 </div>
             """,
@@ -175,7 +173,7 @@ if prompt := st.chat_input("Ask a question about the document"):
     # Display assistant response first
     with st.chat_message("assistant"):
         # Get model response with streaming
-        response = get_chat_response(st.session_state.messages, context)
+        response = get_chat_response(st.session_state.messages, context.text)
 
     # Add assistant response to chat history
     st.session_state.messages.append({"role": "assistant", "content": response})
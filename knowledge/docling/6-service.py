@@ -0,0 +1,187 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from typing import AsyncIterator, List, Literal
+
+import httpx
+import lancedb
+import uvicorn
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from openai import AsyncOpenAI
+from pydantic import BaseModel
+from utils.query_embedding import QueryEmbedder
+from utils.context_packing import ContextPacker
+from utils.reranking import Reranker
+from utils.retrieval import HybridRetriever
+
+load_dotenv()
+
+MODEL = "gpt-4o-mini"
+RETRIEVAL_WORKERS = 32  # Concurrent searches
+
+SYSTEM_PROMPT = """You are a helpful assistant that answers questions based on the provided context.
+Use only the information from the context to answer questions. If you're unsure or the context
+doesn't contain the relevant information, say so.
+
+Context:
+{context}
+"""
+
+
+# --------------------------------------------------------------
+# Shared resources
+# --------------------------------------------------------------
+
+
+class LoopEmbedder:
+    """Embeds on the service's event loop, so embeddings share the chat HTTP pool.
+
+    QueryEmbedder batches from a background thread; each batch is handed to the event loop
+    as one AsyncOpenAI request.
+    """
+
+    retryable_errors = ()
+
+    def __init__(self, client: AsyncOpenAI, loop: asyncio.AbstractEventLoop, function):
+        self.client = client
+        self.loop = loop
+        self.model_name = function.name
+        self.ndims = function.ndims()
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        kwargs = {}
+        if self.model_name.startswith("text-embedding-3"):
+            kwargs["dimensions"] = self.ndims
+        response = asyncio.run_coroutine_threadsafe(
+            self.client.embeddings.create(input=texts, model=self.model_name, **kwargs), self.loop
+        ).result()
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One connection pool and one table handle for every chat session
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        timeout=httpx.Timeout(60.0, connect=5.0),
+    )
+    client = AsyncOpenAI(http_client=http_client)
+    table = lancedb.connect("data/lancedb").open_table("docling")
+    embedder = LoopEmbedder(
+        client, asyncio.get_running_loop(), table.embedding_functions["vector"].function
+    )
+
+    app.state.client = client
+    app.state.context_packer = ContextPacker(max_tokens=2000)
+    app.state.retriever = HybridRetriever(
+        table,
+        embed_query=QueryEmbedder(embedder),
+        reranker=Reranker(),
+        max_workers=RETRIEVAL_WORKERS,
+    )
+    # Retrieval blocks its thread while the query is embedded on the event loop, and the
+    # OpenAI client itself uses the loop's default executor, so searches get their own pool.
+    # The retriever's full-text pool is as large, so every running search can overlap.
+    app.state.retrieval_executor = ThreadPoolExecutor(
+        max_workers=RETRIEVAL_WORKERS, thread_name_prefix="chat-retrieval"
+    )
+    yield
+    app.state.retrieval_executor.shutdown(wait=False)
+    await http_client.aclose()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+# --------------------------------------------------------------
+# Streaming chat endpoint
+# --------------------------------------------------------------
+
+
+class Message(BaseModel):
+    role: Literal["user", "assistant"]
+    content: str
+
+
+class ChatRequest(BaseModel):
+    messages: List[Message]
+    num_results: int = 10
+
+
+def sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def chat_events(request: Request, chat: ChatRequest, query: str) -> AsyncIterator[str]:
+    """Retrieve context, then stream the answer as server-sent events.
+
+    Events: `sources` (the chunks packed into the context, with token counts), `token` (one
+    per content delta), then `done` or `error`. The generation request is sent before the
+    sources event is written, so the model's time to first token overlaps with delivering
+    the sources to the client.
+    """
+    app_state = request.app.state
+    # Flush headers right away so clients see the stream open while retrieval runs
+    yield ": retrieving\n\n"
+
+    generation, stream = None, None
+    try:
+        results = await asyncio.get_running_loop().run_in_executor(
+            app_state.retrieval_executor, app_state.retriever.retrieve, query, chat.num_results
+        )
+        packed = app_state.context_packer.pack(results)
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT.format(context=packed.text)},
+            *(message.model_dump() for message in chat.messages),
+        ]
+        generation = asyncio.create_task(
+            app_state.client.chat.completions.create(
+                model=MODEL, messages=messages, temperature=0.7, stream=True
+            )
+        )
+        yield sse(
+            "sources",
+            {
+                "chunks": [asdict(result) for result in packed.results],
+                "tokens": packed.tokens,
+                "tokens_saved": packed.tokens_saved,
+            },
+        )
+        stream = await generation
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield sse("token", {"content": chunk.choices[0].delta.content})
+        yield sse("done", {})
+    except Exception as e:
+        yield sse("error", {"message": str(e)})
+    finally:
+        # Runs on client disconnect too, so abandoned streams free their connection
+        if generation is not None:
+            generation.cancel()
+        if stream is not None:
+            await stream.close()
+
+
+@app.post("/chat")
+async def chat(request: Request, chat: ChatRequest) -> StreamingResponse:
+    query = next((m.content for m in reversed(chat.messages) if m.role == "user"), None)
+    if query is None:
+        raise HTTPException(status_code=400, detail="messages must contain a user message")
+    return StreamingResponse(
+        chat_events(request, chat, query),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/health")
+async def health() -> dict:
+    return {"status": "ok"}
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host="0.0.0.0", port=8000)
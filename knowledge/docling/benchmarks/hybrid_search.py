@@ -0,0 +1,94 @@
+"""Compare hit rate and latency of hybrid (BM25 + vector, RRF) against vector-only search.
+
+Queries are sampled from the ingested table: section titles and short verbatim spans of
+chunk text, i.e. the exact-term questions that vector search tends to miss. A query is a
+hit when the chunk it was taken from is in the top k. Each query is embedded once with the
+table's embedding function, so this makes one embeddings API call per query.
+Run from knowledge/docling after 3-embedding.py:
+
+    python -m benchmarks.hybrid_search --queries 50 -k 5
+"""
+
+import argparse
+import random
+import time
+from collections import Counter
+from typing import List, Tuple
+
+import lancedb
+import numpy as np
+
+from utils.retrieval import HybridRetriever, ensure_fts_index
+
+
+def sample_queries(table, count: int, span_words: int, rng: random.Random) -> List[Tuple[str, str]]:
+    """(query, id of the chunk it came from) pairs, alternating titles and text spans.
+
+    Only titles that belong to a single chunk are used, so every query has one right answer.
+    """
+    rows = table.search().select(["id", "text", "metadata"]).limit(table.count_rows()).to_list()
+    title_counts = Counter(row["metadata"]["title"] for row in rows)
+    rng.shuffle(rows)
+
+    queries = []
+    for row in rows:
+        if len(queries) >= count:
+            break
+        title = row["metadata"]["title"]
+        words = row["text"].split()
+        use_title = title and title_counts[title] == 1
+        if use_title and (len(queries) % 2 == 0 or len(words) < span_words):
+            queries.append((title, row["id"]))
+        elif len(words) >= span_words:
+            start = rng.randrange(len(words) - span_words + 1)
+            queries.append((" ".join(words[start : start + span_words]), row["id"]))
+    return queries
+
+
+def evaluate(search, queries: List[Tuple[str, str]], k: int) -> Tuple[float, List[float]]:
+    hits, latencies = 0, []
+    for query, expected_id in queries:
+        start = time.perf_counter()
+        results = search(query, k)
+        latencies.append(time.perf_counter() - start)
+        hits += expected_id in results["id"].to_pylist()
+    return hits / len(queries), latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default="data/lancedb")
+    parser.add_argument("--table", default="docling")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--span-words", type=int, default=5)
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+
+    table = lancedb.connect(args.db).open_table(args.table)
+    ensure_fts_index(table)
+    queries = sample_queries(table, args.queries, args.span_words, random.Random(0))
+
+    # Embed every query once up front, so both modes see the same vectors and the
+    # timings measure retrieval rather than the embeddings API
+    embedding_function = table.embedding_functions["vector"].function
+    vectors = dict(
+        zip(
+            [query for query, _ in queries],
+            embedding_function.compute_query_embeddings([query for query, _ in queries]),
+        )
+    )
+    retriever = HybridRetriever(table, embed_query=vectors.__getitem__)
+
+    print(f"{len(queries)} exact-term queries, hit rate @ {args.k}\n")
+    print(f"{'search':<16}{'hit rate':>10}{'p50 (ms)':>12}{'p95 (ms)':>12}")
+    for label, search in (
+        ("vector only", retriever.vector_search),
+        ("hybrid (RRF)", retriever.search),
+    ):
+        hit_rate, latencies = evaluate(search, queries, args.k)
+        p50, p95 = np.percentile(np.array(latencies) * 1000, [50, 95])
+        print(f"{label:<16}{hit_rate:>10.2f}{p50:>12.2f}{p95:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
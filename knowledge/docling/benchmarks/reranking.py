@@ -0,0 +1,106 @@
+"""Measure nDCG@k and added latency of the local reranker on a labelled query set.
+
+Labels are JSON lines of {"query": "...", "relevant": {"<chunk id>": <grade>, ...}}. Without
+--labels, queries are sampled from the table as in benchmarks/hybrid_search.py: the chunk a
+query was taken from has grade 2 and other chunks of the same section grade 1.
+Sampled labels come from section titles and verbatim text spans, the same signals the
+reranker's heading and BM25 features score, so the gain they show is partly circular;
+use hand-labelled queries (--labels) to judge real relevance.
+Query vectors are computed once up front with the table's embedding function.
+Run from knowledge/docling after 3-embedding.py:
+
+    python -m benchmarks.reranking -k 5
+    python -m benchmarks.reranking --labels data/labels.jsonl
+"""
+
+import argparse
+import json
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import lancedb
+import numpy as np
+
+from benchmarks.hybrid_search import sample_queries
+from utils.reranking import Reranker
+from utils.retrieval import HybridRetriever, ensure_fts_index
+
+Labels = List[Tuple[str, Dict[str, int]]]
+
+
+def load_labels(path: str) -> Labels:
+    with open(path, encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    return [(entry["query"], entry["relevant"]) for entry in entries]
+
+
+def sampled_labels(table, count: int) -> Labels:
+    rows = table.search().select(["id", "metadata"]).limit(table.count_rows()).to_list()
+    ids_by_title = defaultdict(list)
+    title_by_id = {}
+    for row in rows:
+        title = row["metadata"]["title"]
+        title_by_id[row["id"]] = title
+        if title:
+            ids_by_title[title].append(row["id"])
+
+    labels = []
+    for query, chunk_id in sample_queries(table, count, span_words=5, rng=random.Random(0)):
+        relevant = {row_id: 1 for row_id in ids_by_title.get(title_by_id[chunk_id], [])}
+        relevant[chunk_id] = 2
+        labels.append((query, relevant))
+    return labels
+
+
+def ndcg(ranked_ids: List[str], relevant: Dict[str, int], k: int) -> float:
+    gains = [2 ** relevant.get(row_id, 0) - 1 for row_id in ranked_ids[:k]]
+    ideal = sorted((2**grade - 1 for grade in relevant.values()), reverse=True)[:k]
+    discounts = 1 / np.log2(np.arange(2, k + 2))
+    ideal_dcg = float(np.dot(ideal, discounts[: len(ideal)]))
+    return float(np.dot(gains, discounts[: len(gains)])) / ideal_dcg if ideal_dcg else 0.0
+
+
+def evaluate(retriever: HybridRetriever, labels: Labels, k: int) -> Tuple[float, List[float]]:
+    scores, latencies = [], []
+    for query, relevant in labels:
+        start = time.perf_counter()
+        results = retriever.retrieve(query, limit=k)
+        latencies.append(time.perf_counter() - start)
+        scores.append(ndcg([result.id for result in results], relevant, k))
+    return float(np.mean(scores)), latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default="data/lancedb")
+    parser.add_argument("--table", default="docling")
+    parser.add_argument("--labels", help="JSON lines file of labelled queries")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--candidates", type=int, default=50)
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+
+    table = lancedb.connect(args.db).open_table(args.table)
+    ensure_fts_index(table)
+    labels = load_labels(args.labels) if args.labels else sampled_labels(table, args.queries)
+
+    embedding_function = table.embedding_functions["vector"].function
+    queries = [query for query, _ in labels]
+    vectors = dict(zip(queries, embedding_function.compute_query_embeddings(queries)))
+
+    print(f"{len(labels)} labelled queries, nDCG@{args.k}\n")
+    print(f"{'retrieval':<28}{'nDCG':>8}{'p50 (ms)':>12}{'p95 (ms)':>12}")
+    for label, reranker in (
+        ("hybrid", None),
+        (f"hybrid + rerank top {args.candidates}", Reranker(candidates=args.candidates)),
+    ):
+        retriever = HybridRetriever(table, embed_query=vectors.__getitem__, reranker=reranker)
+        score, latencies = evaluate(retriever, labels, args.k)
+        p50, p95 = np.percentile(np.array(latencies) * 1000, [50, 95])
+        print(f"{label:<28}{score:>8.3f}{p50:>12.2f}{p95:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
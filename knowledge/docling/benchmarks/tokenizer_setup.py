@@ -0,0 +1,61 @@
+"""Compare time and peak memory of chunker setup with the old dict-building get_vocab.
+
+Run from knowledge/docling:
+
+    python -m benchmarks.tokenizer_setup --vocab-calls 20
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from docling.chunking import HybridChunker
+from utils.tokenizer import OpenAITokenizerWrapper
+
+MAX_TOKENS = 8191
+
+
+class DictVocabTokenizerWrapper(OpenAITokenizerWrapper):
+    """The previous behaviour: a fresh ~100k entry dict on every get_vocab() call."""
+
+    def get_vocab(self):
+        return dict(enumerate(range(self.vocab_size)))
+
+
+def measure(tokenizer_cls, vocab_calls: int) -> tuple[float, float]:
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    tokenizer = tokenizer_cls()
+    HybridChunker(tokenizer=tokenizer, max_tokens=MAX_TOKENS, merge_peers=True)
+    # HuggingFace helpers (len(), added-token handling, ...) look the vocabulary up repeatedly
+    for _ in range(vocab_calls):
+        vocab = tokenizer.get_vocab()
+        len(vocab)
+        "42" in vocab
+
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vocab-calls", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'tokenizer':<16}{'best time (ms)':>16}{'peak memory (MB)':>18}")
+    for label, tokenizer_cls in (
+        ("before (dict)", DictVocabTokenizerWrapper),
+        ("after (view)", OpenAITokenizerWrapper),
+    ):
+        results = [measure(tokenizer_cls, args.vocab_calls) for _ in range(args.runs)]
+        best_time = min(elapsed for elapsed, _ in results)
+        peak = max(peak for _, peak in results)
+        print(f"{label:<16}{best_time * 1000:>16.1f}{peak:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
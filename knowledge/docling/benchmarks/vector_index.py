@@ -0,0 +1,153 @@
+"""Compare recall and latency of indexed vector search against exact search.
+
+Builds a synthetic table of clustered unit vectors (or copies an existing table with --db,
+holding out random rows as queries), indexes it, and runs the held-out query set at several
+nprobes/refine_factor settings.
+Run from knowledge/docling:
+
+    python -m benchmarks.vector_index --rows 100000 --ndims 256
+    python -m benchmarks.vector_index --db data/lancedb --table docling --min-rows 0
+
+PQ trains 256 centroids per sub-vector, so PQ indexes need a table of at least 256 rows;
+the tutorial table of a single PDF is too small.
+"""
+
+import argparse
+import tempfile
+import time
+from typing import List, Tuple
+
+import lancedb
+import numpy as np
+import pyarrow as pa
+
+from utils.vector_index import SearchParams, ensure_vector_index
+
+# Product quantization trains a 256-entry codebook per sub-vector
+MIN_PQ_TRAINING_ROWS = 256
+
+SETTINGS = [
+    SearchParams(nprobes=5),
+    SearchParams(nprobes=10),
+    SearchParams(nprobes=20),
+    SearchParams(nprobes=50),
+    SearchParams(nprobes=10, refine_factor=5),
+    SearchParams(nprobes=20, refine_factor=10),
+]
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def synthetic_table(db, rows: int, ndims: int, rng: np.random.Generator):
+    """Clustered unit vectors, a rough stand-in for embeddings of a document corpus."""
+    centers = rng.standard_normal((max(1, rows // 500), ndims))
+    vectors = normalize(
+        centers[rng.integers(len(centers), size=rows)] + 0.5 * rng.standard_normal((rows, ndims))
+    )
+    data = pa.table(
+        {
+            "id": pa.array(np.arange(rows)),
+            "vector": pa.FixedSizeListArray.from_arrays(pa.array(vectors.ravel()), ndims),
+        }
+    )
+    return db.create_table("vectors", data, mode="overwrite"), centers
+
+
+def held_out_queries(centers: np.ndarray, queries: int, rng: np.random.Generator) -> np.ndarray:
+    """Noisy cluster centers, drawn like the synthetic rows but not part of the table."""
+    base = centers[rng.integers(len(centers), size=queries)]
+    return normalize(base + 0.5 * rng.standard_normal(base.shape))
+
+
+def copy_with_held_out_rows(db, source, queries: int, rng: np.random.Generator):
+    """Copy a table's vectors, holding out random rows to use as the query set.
+
+    Real embeddings are the only realistic queries for a real table, and removing them from
+    the copy keeps each query from trivially finding itself.
+    """
+    vectors = (
+        source.search().select(["vector"]).limit(source.count_rows()).to_arrow().select(["vector"])
+    )
+    held_out = rng.choice(len(vectors), size=min(queries, len(vectors) // 2), replace=False)
+    keep = np.ones(len(vectors), dtype=bool)
+    keep[held_out] = False
+    query_vectors = np.stack(vectors["vector"].take(held_out).to_numpy(zero_copy_only=False))
+    table = db.create_table("vectors", vectors.filter(pa.array(keep)))
+    return table, query_vectors.astype(np.float32)
+
+
+def run_queries(table, queries: np.ndarray, k: int, params=None) -> Tuple[List[set], List[float]]:
+    results, latencies = [], []
+    for query in queries:
+        builder = table.search(query).select(["_rowid"]).with_row_id(True).limit(k)
+        builder = params.apply(builder) if params else builder.bypass_vector_index()
+        start = time.perf_counter()
+        hits = builder.to_arrow()
+        latencies.append(time.perf_counter() - start)
+        results.append(set(hits["_rowid"].to_pylist()))
+    return results, latencies
+
+
+def report(label: str, results, truth, latencies, k: int) -> None:
+    recall = np.mean([len(found & exact) / k for found, exact in zip(results, truth)])
+    p50, p95 = np.percentile(np.array(latencies) * 1000, [50, 95])
+    print(f"{label:<28}{recall:>10.3f}{p50:>12.2f}{p95:>12.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--ndims", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--index-type", default="IVF_PQ")
+    parser.add_argument("--min-rows", type=int, default=10_000)
+    parser.add_argument("--db", help="Existing LanceDB directory (default: synthetic data)")
+    parser.add_argument("--table", default="docling")
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.db:
+            # Index a copy, so the benchmark never changes the real table's index
+            source = lancedb.connect(args.db).open_table(args.table)
+            table, queries = copy_with_held_out_rows(
+                lancedb.connect(tmp), source, args.queries, rng
+            )
+        else:
+            table, centers = synthetic_table(lancedb.connect(tmp), args.rows, args.ndims, rng)
+            queries = held_out_queries(centers, args.queries, rng)
+
+        if "PQ" in args.index_type and table.count_rows() < MIN_PQ_TRAINING_ROWS:
+            print(
+                f"Table has {table.count_rows()} rows; {args.index_type} needs at least "
+                f"{MIN_PQ_TRAINING_ROWS} to train. Use a larger table or the synthetic data."
+            )
+            return
+
+        truth, exact_latencies = run_queries(table, queries, args.k)
+
+        start = time.perf_counter()
+        indexed = ensure_vector_index(
+            table, min_rows=args.min_rows, index_type=args.index_type, replace=True
+        )
+        if not indexed:
+            print(f"Table has fewer than {args.min_rows} rows; nothing to compare")
+            return
+        print(
+            f"{table.count_rows()} rows, {args.index_type} index built in "
+            f"{time.perf_counter() - start:.1f}s, recall@{args.k} over {len(queries)} queries\n"
+        )
+
+        print(f"{'search':<28}{'recall':>10}{'p50 (ms)':>12}{'p95 (ms)':>12}")
+        report("exact (brute force)", truth, truth, exact_latencies, args.k)
+        for params in SETTINGS:
+            results, latencies = run_queries(table, queries, args.k, params)
+            label = f"nprobes={params.nprobes} refine={params.refine_factor}"
+            report(label, results, truth, latencies, args.k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from docling.chunking import HybridChunker
+from docling_core.transforms.chunker.base import BaseChunk
+from docling_core.types.doc import DoclingDocument
+
+from utils.tokenizer import OpenAITokenizerWrapper
+
+# One tokenizer and chunker per worker process, created once by the pool initializer
+_chunker: Optional[HybridChunker] = None
+
+
+@dataclass
+class ChunkingStats:
+    documents: int = 0
+    chunks: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def documents_per_second(self) -> float:
+        return self.documents / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.chunks} chunks from {self.documents} documents "
+            f"in {self.elapsed:.1f}s ({self.documents_per_second:.2f} docs/sec)"
+        )
+
+
+def document_id(document: DoclingDocument) -> str:
+    """Stable id of a document: the hash of its source bytes, or its name if it has no origin."""
+    if document.origin is not None:
+        return str(document.origin.binary_hash)
+    return document.name
+
+
+def _build_chunker(model_name: str, max_tokens: int, merge_peers: bool) -> HybridChunker:
+    return HybridChunker(
+        tokenizer=OpenAITokenizerWrapper(model_name=model_name, max_length=max_tokens),
+        max_tokens=max_tokens,
+        merge_peers=merge_peers,
+    )
+
+
+def _init_worker(model_name: str, max_tokens: int, merge_peers: bool) -> None:
+    global _chunker
+    _chunker = _build_chunker(model_name, max_tokens, merge_peers)
+
+
+def _chunk_document(doc_id: str, document: DoclingDocument) -> Tuple[str, List[BaseChunk]]:
+    """Chunk one document inside a worker, keeping the chunks in document order."""
+    return doc_id, list(_chunker.chunk(dl_doc=document))
+
+
+class CorpusChunker:
+    """Chunks many documents in parallel with a bounded process pool.
+
+    Each worker builds its own tokenizer (sharing its token cache across all documents it
+    chunks) and HybridChunker once. Results stream back as `(doc_id, chunk)` pairs as soon as
+    a document is done; chunks of one document are always yielded together and in order,
+    while documents may finish in any order.
+
+    Like `CrawlPipeline`, scripts that use this should keep their top-level work under
+    `if __name__ == "__main__":`.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 8191,
+        merge_peers: bool = True,
+        model_name: str = "cl100k_base",
+        max_workers: Optional[int] = None,
+    ):
+        self.max_tokens = max_tokens
+        self.merge_peers = merge_peers
+        self.model_name = model_name
+        # Chunking is CPU bound, so default to one worker per core
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.stats = ChunkingStats()
+
+    def run(self, documents: Iterable[DoclingDocument]) -> Iterator[Tuple[str, BaseChunk]]:
+        """Chunk all documents, yielding `(doc_id, chunk)` pairs as documents complete."""
+        self.stats = ChunkingStats()
+        start = time.perf_counter()
+        settings = (self.model_name, self.max_tokens, self.merge_peers)
+
+        def emit(doc_id: str, chunks: List[BaseChunk]) -> Iterator[Tuple[str, BaseChunk]]:
+            self.stats.documents += 1
+            self.stats.chunks += len(chunks)
+            self.stats.elapsed = time.perf_counter() - start
+            for chunk in chunks:
+                yield doc_id, chunk
+
+        # A single worker is not worth the process start-up and pickling costs
+        if self.max_workers <= 1:
+            chunker = _build_chunker(*settings)
+            for document in documents:
+                yield from emit(document_id(document), list(chunker.chunk(dl_doc=document)))
+            return
+
+        with ProcessPoolExecutor(
+            max_workers=self.max_workers, initializer=_init_worker, initargs=settings
+        ) as executor:
+            in_flight: Set[Future] = set()
+
+            def drain() -> Iterator[Tuple[str, BaseChunk]]:
+                nonlocal in_flight
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from emit(*future.result())
+
+            for document in documents:
+                in_flight.add(executor.submit(_chunk_document, document_id(document), document))
+                # Bound the number of documents held in memory at once
+                if len(in_flight) >= self.max_workers * 2:
+                    yield from drain()
+
+            while in_flight:
+                yield from drain()
+
+        self.stats.elapsed = time.perf_counter() - start
+
+    def chunk_all(self, documents: Iterable[DoclingDocument]) -> Dict[str, List[BaseChunk]]:
+        """Chunk all documents and group the chunks by document id."""
+        grouped: Dict[str, List[BaseChunk]] = {}
+        for doc_id, chunk in self.run(documents):
+            grouped.setdefault(doc_id, []).append(chunk)
+        return grouped
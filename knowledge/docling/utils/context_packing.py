@@ -0,0 +1,125 @@
+import hashlib
+from dataclasses import dataclass
+from typing import List, Sequence, Set
+
+from tiktoken import get_encoding
+
+from utils.retrieval import SearchResult, format_context
+
+
+@dataclass
+class PackedContext:
+    text: str
+    results: List[SearchResult]
+    tokens: int
+    tokens_before: int
+    duplicates_dropped: int = 0
+    over_budget_dropped: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens
+
+    def __str__(self) -> str:
+        return (
+            f"Context: {len(self.results)} chunks, {self.tokens} tokens "
+            f"({self.tokens_saved} saved; {self.duplicates_dropped} near-duplicates and "
+            f"{self.over_budget_dropped} over-budget chunks dropped)"
+        )
+
+
+@dataclass
+class _Candidate:
+    rank: int
+    result: SearchResult
+    tokens: int
+    shingles: Set[bytes]
+
+
+def shingles(text: str, size: int) -> Set[bytes]:
+    """Hashes of every run of `size` consecutive words, ignoring case."""
+    words = text.lower().split()
+    windows = [words[i : i + size] for i in range(max(1, len(words) - size + 1))]
+    return {
+        hashlib.blake2b(" ".join(window).encode(), digest_size=8).digest() for window in windows
+    }
+
+
+class ContextPacker:
+    """Packs retrieved chunks into a prompt context under a token budget.
+
+    Chunks are visited in score order and dropped if most of their shingles already appear
+    in a kept chunk (overlapping `merge_peers` chunks often repeat text). The survivors are
+    then chosen by score per token until the budget is full, and rendered in rank order.
+
+    Args:
+        max_tokens: Token budget of the packed context
+        encoding_name: tiktoken encoding of the chat model (o200k_base for gpt-4o models)
+        shingle_size: Words per shingle used for near-duplicate detection
+        duplicate_threshold: Share of a chunk's shingles found in a kept chunk above which it
+            counts as a near-duplicate
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 2000,
+        encoding_name: str = "o200k_base",
+        shingle_size: int = 5,
+        duplicate_threshold: float = 0.8,
+    ):
+        self.max_tokens = max_tokens
+        self.encoding = get_encoding(encoding_name)
+        self.shingle_size = shingle_size
+        self.duplicate_threshold = duplicate_threshold
+
+    def _is_duplicate(self, candidate: _Candidate, kept: List[_Candidate]) -> bool:
+        for other in kept:
+            overlap = len(candidate.shingles & other.shingles)
+            smaller = min(len(candidate.shingles), len(other.shingles))
+            if overlap / smaller >= self.duplicate_threshold:
+                return True
+        return False
+
+    def pack(self, results: Sequence[SearchResult]) -> PackedContext:
+        """Select and render results, best first, as returned by the retriever."""
+        blocks = [format_context([result]) for result in results]
+        token_counts = [len(ids) for ids in self.encoding.encode_ordinary_batch(blocks)]
+        candidates = [
+            _Candidate(
+                rank=rank,
+                result=result,
+                tokens=tokens,
+                shingles=shingles(result.text, self.shingle_size),
+            )
+            for rank, (result, tokens) in enumerate(zip(results, token_counts))
+        ]
+
+        unique: List[_Candidate] = []
+        for candidate in sorted(candidates, key=lambda c: (-c.result.score, c.rank)):
+            if not self._is_duplicate(candidate, unique):
+                unique.append(candidate)
+
+        # Greedy knapsack by score density; smaller chunks that still fit fill the gaps
+        selected: List[_Candidate] = []
+        used = 0
+        for candidate in sorted(
+            unique, key=lambda c: (-c.result.score / max(c.tokens, 1), c.rank)
+        ):
+            if used + candidate.tokens <= self.max_tokens:
+                selected.append(candidate)
+                used += candidate.tokens
+        # An empty context cannot answer anything, so the best chunk is kept regardless
+        if not selected and unique:
+            selected.append(unique[0])
+        selected.sort(key=lambda c: c.rank)
+
+        kept = [candidate.result for candidate in selected]
+        text = format_context(kept)
+        return PackedContext(
+            text=text,
+            results=kept,
+            tokens=len(self.encoding.encode_ordinary(text)),
+            tokens_before=len(self.encoding.encode_ordinary(format_context(results))),
+            duplicates_dropped=len(candidates) - len(unique),
+            over_budget_dropped=len(unique) - len(selected),
+        )
@@ -0,0 +1,79 @@
+import gzip
+import hashlib
+import json
+import os
+from importlib.metadata import version
+from pathlib import Path
+from typing import Union
+
+from docling.document_converter import DocumentConverter
+from docling_core.types.doc import DoclingDocument
+from docling_core.utils.file import resolve_source_to_stream
+
+
+class ConversionCache:
+    """Persistent cache of converted documents, so layout analysis only runs once per source.
+
+    Entries are keyed by the SHA-256 of the source bytes plus the docling versions and the
+    converter's format options, and stored as gzipped `export_to_dict()` JSON. A changed
+    document, docling upgrade or pipeline option change therefore triggers a reconversion.
+    """
+
+    def __init__(self, converter: DocumentConverter, cache_dir: str = "data/conversion_cache"):
+        self.converter = converter
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.converter_key = self._converter_key()
+        self.hits = 0
+        self.misses = 0
+
+    def _converter_key(self) -> str:
+        parts = [version("docling"), version("docling-core")]
+        for input_format, option in sorted(
+            self.converter.format_to_options.items(), key=lambda item: str(item[0])
+        ):
+            pipeline_options = (
+                option.pipeline_options.model_dump(mode="json")
+                if option.pipeline_options
+                else None
+            )
+            parts.append(
+                json.dumps(
+                    [
+                        str(input_format),
+                        option.pipeline_cls.__name__,
+                        option.backend.__name__,
+                        pipeline_options,
+                    ],
+                    sort_keys=True,
+                    default=str,
+                )
+            )
+        return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+    def convert(self, source: Union[str, Path]) -> DoclingDocument:
+        """Return the converted document for a URL or local path, converting only on a miss."""
+        stream = resolve_source_to_stream(source)
+        content = stream.stream.getvalue()
+        key = hashlib.sha256(content + self.converter_key.encode()).hexdigest()
+        cache_path = self.cache_dir / f"{key}.json.gz"
+
+        if cache_path.exists():
+            self.hits += 1
+            with gzip.open(cache_path, "rt", encoding="utf-8") as f:
+                return DoclingDocument.model_validate(json.load(f))
+
+        self.misses += 1
+        result = self.converter.convert(stream)
+
+        # Write to a temporary file first so an interrupted run never leaves a corrupt entry
+        tmp_path = cache_path.with_suffix(".tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(result.document.export_to_dict(), f, separators=(",", ":"))
+        os.replace(tmp_path, cache_path)
+        return result.document
+
+    def report(self) -> str:
+        total = self.hits + self.misses
+        hit_rate = self.hits / total if total else 0.0
+        return f"Conversion cache: {self.hits} hits, {self.misses} misses ({hit_rate:.0%} hit rate)"
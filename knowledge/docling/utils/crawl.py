@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Set, Tuple
+
+from docling.document_converter import DocumentConverter
+
+# One converter per worker process, created once by the pool initializer
+_converter: Optional[DocumentConverter] = None
+
+
+@dataclass
+class CrawlStats:
+    converted: int = 0
+    failed: int = 0
+    skipped: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.converted / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.converted} converted, {self.failed} failed, {self.skipped} skipped "
+            f"in {self.elapsed:.1f}s ({self.pages_per_second:.2f} pages/sec)"
+        )
+
+
+def _init_worker() -> None:
+    global _converter
+    _converter = DocumentConverter()
+
+
+def _convert_to_file(url: str, output_path: Path) -> Tuple[str, Optional[str]]:
+    """Convert one URL inside a worker and write the document JSON atomically.
+
+    Returns:
+        The URL and an error message, or None on success
+    """
+    try:
+        result = _converter.convert(url)
+        tmp_path = output_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(result.document.export_to_dict()), encoding="utf-8")
+        os.replace(tmp_path, output_path)
+        return url, None
+    except Exception as e:
+        return url, str(e)
+
+
+class CrawlPipeline:
+    """Converts URLs with a bounded process pool and streams each document to disk.
+
+    Every finished URL is appended to `progress.jsonl` in the output directory, so running
+    the pipeline again over the same URLs resumes where a crashed crawl stopped. Failed URLs
+    are retried on the next run.
+
+    Scripts that use the pipeline should keep their top-level work under
+    `if __name__ == "__main__":`, because worker processes re-import the main module on
+    platforms that spawn instead of fork.
+    """
+
+    def __init__(self, output_dir: str = "data/crawl", max_workers: int = 4):
+        self.output_dir = Path(output_dir)
+        self.max_workers = max_workers
+        self.checkpoint_path = self.output_dir / "progress.jsonl"
+        self.stats = CrawlStats()
+
+    def output_path(self, url: str) -> Path:
+        return self.output_dir / f"{hashlib.sha256(url.encode()).hexdigest()[:16]}.json"
+
+    def _completed_urls(self) -> Set[str]:
+        if not self.checkpoint_path.exists():
+            return set()
+        completed = set()
+        with self.checkpoint_path.open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # A crash can leave a partial last line
+                if entry.get("status") == "done":
+                    completed.add(entry["url"])
+        return completed
+
+    def run(self, urls: Iterable[str]) -> Iterator[Path]:
+        """Convert all URLs, yielding the path of each document JSON as soon as it is written."""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        completed = self._completed_urls()
+        self.stats = CrawlStats()
+        start = time.perf_counter()
+
+        with (
+            ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker) as executor,
+            self.checkpoint_path.open("a", encoding="utf-8") as checkpoint,
+        ):
+            in_flight: Set[Future] = set()
+
+            def drain() -> Iterator[Path]:
+                nonlocal in_flight
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, error = future.result()
+                    entry = {"url": url, "status": "failed" if error else "done"}
+                    if error:
+                        entry["error"] = error
+                        self.stats.failed += 1
+                    else:
+                        entry["file"] = self.output_path(url).name
+                        self.stats.converted += 1
+                    checkpoint.write(json.dumps(entry) + "\n")
+                    checkpoint.flush()
+                    self.stats.elapsed = time.perf_counter() - start
+                    if not error:
+                        yield self.output_path(url)
+
+            for url in urls:
+                if url in completed:
+                    self.stats.skipped += 1
+                    continue
+                completed.add(url)  # Also drops duplicate URLs within this run
+                in_flight.add(executor.submit(_convert_to_file, url, self.output_path(url)))
+                # Keep the queue bounded so huge sitemaps do not pile up pending work
+                if len(in_flight) >= self.max_workers * 2:
+                    yield from drain()
+
+            while in_flight:
+                yield from drain()
+
+        self.stats.elapsed = time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    from sitemap import get_sitemap_urls
+
+    pipeline = CrawlPipeline(output_dir="data/crawl")
+    for path in pipeline.run(get_sitemap_urls("https://ds4sd.github.io/docling/")):
+        print(f"Saved {path} | {pipeline.stats}")
+    print(pipeline.stats)
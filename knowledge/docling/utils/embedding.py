@@ -0,0 +1,288 @@
+import hashlib
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Protocol, Sequence, Tuple
+
+import numpy as np
+import openai
+import pyarrow as pa
+from tiktoken import get_encoding
+
+from utils.embedding_cache import EmbeddingCache, normalized_text_hash
+
+
+class Embedder(Protocol):
+    """Anything that turns a batch of texts into vectors of a fixed size."""
+
+    model_name: str
+    ndims: int
+    # Exceptions worth retrying with backoff (rate limits, timeouts, ...)
+    retryable_errors: Tuple[type, ...]
+
+    def embed(self, texts: List[str]) -> List[List[float]]: ...
+
+
+class OpenAIEmbedder:
+    """Embeds texts with the OpenAI embeddings API."""
+
+    retryable_errors = (
+        openai.RateLimitError,
+        openai.APIConnectionError,
+        openai.APITimeoutError,
+        openai.InternalServerError,
+    )
+
+    def __init__(
+        self,
+        model_name: str = "text-embedding-3-large",
+        ndims: int = 3072,
+        client: Optional[openai.OpenAI] = None,
+    ):
+        self.model_name = model_name
+        self.ndims = ndims
+        # Retries are handled by EmbeddingPipeline, with backoff shared across batches
+        self.client = client or openai.OpenAI(max_retries=0)
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        kwargs = {}
+        # Only the text-embedding-3 models can shorten their vectors
+        if self.model_name.startswith("text-embedding-3"):
+            kwargs["dimensions"] = self.ndims
+        response = self.client.embeddings.create(input=texts, model=self.model_name, **kwargs)
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+class FakeEmbedder:
+    """Deterministic local embedder for tests and benchmarks.
+
+    The same text always maps to the same unit vector, and no network is involved.
+
+    Args:
+        ndims: Vector size
+        latency: Seconds each call sleeps, to simulate a remote API
+        transient_failures: Number of initial calls that raise ConnectionError
+    """
+
+    retryable_errors = (ConnectionError,)
+
+    def __init__(self, ndims: int = 64, latency: float = 0.0, transient_failures: int = 0):
+        self.model_name = "fake"
+        self.ndims = ndims
+        self.latency = latency
+        self.transient_failures = transient_failures
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            self.calls += 1
+            fail = self.calls <= self.transient_failures
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise ConnectionError("Simulated transient embedding failure")
+
+        vectors = []
+        for text in texts:
+            seed = int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "big")
+            vector = np.random.default_rng(seed).standard_normal(self.ndims)
+            vectors.append((vector / np.linalg.norm(vector)).tolist())
+        return vectors
+
+
+@dataclass
+class EmbeddingStats:
+    texts: int = 0
+    cached: int = 0
+    embedded: int = 0
+    tokens: int = 0
+    batches: int = 0
+    retries: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def duplicates(self) -> int:
+        return self.texts - self.cached - self.embedded
+
+    @property
+    def embeddings_per_second(self) -> float:
+        return self.embedded / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def tokens_per_second(self) -> float:
+        return self.tokens / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.embedded} embeddings ({self.cached} cached, "
+            f"{self.duplicates} duplicates skipped) in "
+            f"{self.batches} batches, {self.retries} retries, {self.elapsed:.1f}s "
+            f"({self.embeddings_per_second:.1f} embeddings/sec, "
+            f"{self.tokens_per_second:.0f} tokens/sec)"
+        )
+
+
+class EmbeddingPipeline:
+    """Explicit embedding stage for the LanceDB ingest.
+
+    Identical texts within a write batch are embedded once, texts found in the optional
+    persistent cache skip the API entirely, and the remaining texts are packed into batches
+    that respect the provider's per-request token and input limits. Several batches are
+    embedded concurrently, retrying transient errors with exponential backoff and jitter.
+    Vectors are written to LanceDB as Arrow record batches, so the table's embedding function
+    is skipped.
+
+    Args:
+        embedder: The model to embed with (e.g. OpenAIEmbedder or FakeEmbedder)
+        encoding_name: tiktoken encoding used to count tokens per text
+        max_batch_tokens: Token limit of one request (OpenAI allows 300k)
+        max_batch_size: Input limit of one request (OpenAI allows 2048)
+        max_concurrency: Number of requests in flight at once
+        max_retries: Retries per batch before the error is raised
+        write_batch_size: Rows embedded and written to LanceDB per record batch
+        cache: Persistent embedding cache for the embedder's model and vector size
+    """
+
+    def __init__(
+        self,
+        embedder: Embedder,
+        encoding_name: str = "cl100k_base",
+        max_batch_tokens: int = 300_000,
+        max_batch_size: int = 2048,
+        max_concurrency: int = 4,
+        max_retries: int = 6,
+        write_batch_size: int = 8192,
+        cache: Optional[EmbeddingCache] = None,
+    ):
+        self.embedder = embedder
+        self.encoding = get_encoding(encoding_name)
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.write_batch_size = write_batch_size
+        if cache is not None and (cache.model_name, cache.ndims) != (
+            embedder.model_name,
+            embedder.ndims,
+        ):
+            raise ValueError(
+                f"Embedding cache is for {cache.model_name} ({cache.ndims} dims), "
+                f"but the embedder is {embedder.model_name} ({embedder.ndims} dims)"
+            )
+        self.cache = cache
+        self.stats = EmbeddingStats()
+        self._stats_lock = threading.Lock()
+
+    def _pack_batches(self, token_counts: List[int]) -> List[List[int]]:
+        """Greedily group text indices into batches under the token and size limits."""
+        batches: List[List[int]] = []
+        batch: List[int] = []
+        batch_tokens = 0
+        for index, tokens in enumerate(token_counts):
+            if batch and (
+                batch_tokens + tokens > self.max_batch_tokens
+                or len(batch) >= self.max_batch_size
+            ):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(index)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _embed_with_retry(self, texts: List[str]) -> List[List[float]]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.embedder.embed(texts)
+            except self.embedder.retryable_errors:
+                if attempt == self.max_retries:
+                    raise
+                with self._stats_lock:
+                    self.stats.retries += 1
+                time.sleep(min(30.0, 0.5 * 2**attempt) * random.uniform(0.5, 1.0))
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed texts, returning a float32 matrix with one row per input text."""
+        start = time.perf_counter()
+        rows_by_hash: Dict[bytes, List[int]] = {}
+        for row, text in enumerate(texts):
+            rows_by_hash.setdefault(normalized_text_hash(text), []).append(row)
+        # Rows sharing a text are embedded once and the vector is copied to all of them
+        keys = list(rows_by_hash)
+        matrix = np.empty((len(texts), self.embedder.ndims), dtype=np.float32)
+
+        missing = list(range(len(keys)))
+        if self.cache is not None:
+            missing = []
+            for i, vector in enumerate(self.cache.get(keys)):
+                if vector is None:
+                    missing.append(i)
+                else:
+                    matrix[rows_by_hash[keys[i]]] = vector
+        missing_texts = [texts[rows_by_hash[keys[i]][0]] for i in missing]
+
+        token_counts = [
+            len(ids) for ids in self.encoding.encode_ordinary_batch(missing_texts)
+        ]
+        batches = [[missing[i] for i in batch] for batch in self._pack_batches(token_counts)]
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            futures = {
+                executor.submit(
+                    self._embed_with_retry, [texts[rows_by_hash[keys[i]][0]] for i in batch]
+                ): batch
+                for batch in batches
+            }
+            for future in as_completed(futures):
+                batch = futures[future]
+                vectors = np.asarray(future.result(), dtype=np.float32)
+                for i, vector in zip(batch, vectors):
+                    matrix[rows_by_hash[keys[i]]] = vector
+                # Store each batch as it lands, so an interrupted ingest keeps its progress
+                if self.cache is not None:
+                    self.cache.put([keys[i] for i in batch], vectors)
+
+        with self._stats_lock:
+            self.stats.texts += len(texts)
+            self.stats.cached += len(keys) - len(missing)
+            self.stats.embedded += len(missing)
+            self.stats.tokens += sum(token_counts)
+            self.stats.batches += len(batches)
+            self.stats.elapsed += time.perf_counter() - start
+        return matrix
+
+    def record_batches(
+        self, rows: List[dict], schema: pa.Schema, vector_column: str = "vector"
+    ) -> Iterator[pa.RecordBatch]:
+        """Embed each row's `text` and yield Arrow record batches matching the table schema."""
+        vector_type = schema.field(vector_column).type
+        for offset in range(0, len(rows), self.write_batch_size):
+            window = rows[offset : offset + self.write_batch_size]
+            matrix = self.embed([row["text"] for row in window])
+
+            arrays = []
+            for field in schema:
+                if field.name == vector_column:
+                    values = pa.array(matrix.ravel(), type=vector_type.value_type)
+                    arrays.append(
+                        pa.FixedSizeListArray.from_arrays(values, vector_type.list_size)
+                    )
+                else:
+                    arrays.append(pa.array([row.get(field.name) for row in window], field.type))
+            yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    def write(self, table, rows: List[dict], vector_column: str = "vector") -> None:
+        """Embed rows and append them to a LanceDB table in a single streamed write."""
+        self.stats = EmbeddingStats()
+        if not rows:
+            return
+        schema = table.schema
+        table.add(
+            pa.RecordBatchReader.from_batches(
+                schema, self.record_batches(rows, schema, vector_column)
+            )
+        )
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+DIGEST_SIZE = 32  # bytes of a SHA-256 digest
+
+
+def normalized_text_hash(text: str) -> bytes:
+    """Hash of a text after Unicode (NFC) and whitespace normalization.
+
+    Texts that only differ in spacing or Unicode composition share one embedding.
+    """
+    normalized = unicodedata.normalize("NFC", " ".join(text.split()))
+    return hashlib.sha256(normalized.encode()).digest()
+
+
+class EmbeddingCache:
+    """Content-addressed, on-disk cache of embeddings for one model and vector size.
+
+    Vectors live in an append-only float32 matrix (`vectors.f32`) that is read through a
+    memory map, and `index.bin` holds the text hash of every row in the same order. Each
+    (model, ndims) pair gets its own directory under `cache_dir`, so one cache directory can
+    be shared by every ingest and table that uses the same embedding model.
+
+    Only one process should write to a cache directory at a time.
+    """
+
+    def __init__(self, model_name: str, ndims: int, cache_dir: str = "data/embedding_cache"):
+        self.model_name = model_name
+        self.ndims = ndims
+        self.path = Path(cache_dir) / f"{re.sub(r'[^A-Za-z0-9._-]', '_', model_name)}-{ndims}"
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.vectors_path = self.path / "vectors.f32"
+        self.index_path = self.path / "index.bin"
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.memmap] = None
+
+        meta_path = self.path / "meta.json"
+        if not meta_path.exists():
+            meta_path.write_text(json.dumps({"model_name": model_name, "ndims": ndims}))
+        self._rows = self._load_index()
+
+    def _load_index(self) -> Dict[bytes, int]:
+        self.vectors_path.touch()
+        self.index_path.touch()
+        row_bytes = self.ndims * 4
+        # A crash between the two appends leaves a partial row behind; drop it
+        rows = min(
+            self.index_path.stat().st_size // DIGEST_SIZE,
+            self.vectors_path.stat().st_size // row_bytes,
+        )
+        os.truncate(self.index_path, rows * DIGEST_SIZE)
+        os.truncate(self.vectors_path, rows * row_bytes)
+
+        index = self.index_path.read_bytes()
+        return {index[i * DIGEST_SIZE : (i + 1) * DIGEST_SIZE]: i for i in range(rows)}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _vectors(self) -> np.ndarray:
+        # Remap after appends, since a memory map does not grow with its file
+        if self._matrix is None or len(self._matrix) != len(self._rows):
+            self._matrix = np.memmap(
+                self.vectors_path, dtype=np.float32, mode="r", shape=(len(self._rows), self.ndims)
+            )
+        return self._matrix
+
+    def get(self, keys: List[bytes]) -> List[Optional[np.ndarray]]:
+        """Look up vectors by text hash, returning None for texts that are not cached."""
+        with self._lock:
+            rows = [self._rows.get(key) for key in keys]
+            found = [row for row in rows if row is not None]
+            vectors = self._vectors()[found] if found else None
+
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        results: List[Optional[np.ndarray]] = []
+        position = 0
+        for row in rows:
+            if row is None:
+                results.append(None)
+            else:
+                results.append(vectors[position])
+                position += 1
+        return results
+
+    def put(self, keys: List[bytes], vectors: np.ndarray) -> None:
+        """Append vectors for text hashes that are not cached yet."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, self.ndims)
+        with self._lock:
+            new = {}
+            for i, key in enumerate(keys):
+                if key not in self._rows and key not in new:
+                    new[key] = i
+            if not new:
+                return
+
+            # Vectors are written before the index, so every indexed row is complete
+            with self.vectors_path.open("ab") as f:
+                f.write(vectors[list(new.values())].tobytes())
+            with self.index_path.open("ab") as f:
+                f.write(b"".join(new))
+            for key in new:
+                self._rows[key] = len(self._rows)
+
+    def report(self) -> str:
+        total = self.hits + self.misses
+        hit_rate = self.hits / total if total else 0.0
+        return (
+            f"Embedding cache: {self.hits} hits, {self.misses} misses "
+            f"({hit_rate:.0%} hit rate), {len(self)} vectors stored"
+        )
@@ -0,0 +1,154 @@
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Collection, Dict, List, Optional, Sequence
+
+import pyarrow as pa
+
+from utils.embedding import EmbeddingPipeline, EmbeddingStats
+from utils.embedding_cache import normalized_text_hash
+
+# Ids per DELETE predicate, to keep the SQL filter a reasonable size
+DELETE_BATCH_SIZE = 1000
+
+
+def chunk_id(source: str, headings: Optional[Sequence[str]], text: str) -> str:
+    """Stable id of a chunk, derived from its source, heading path and content.
+
+    The same chunk gets the same id on every run, so unchanged chunks can be recognised
+    without comparing vectors or text.
+    """
+    key = "\x1f".join([source, " > ".join(headings or []), normalized_text_hash(text).hex()])
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+@dataclass
+class IngestStats:
+    inserted: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+    elapsed: float = 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.inserted} inserted, {self.deleted} deleted, {self.unchanged} unchanged "
+            f"in {self.elapsed:.1f}s"
+        )
+
+
+class IncrementalIngest:
+    """Keeps a LanceDB table in sync with a corpus without rebuilding it.
+
+    Rows carry a stable `id` (see `chunk_id`) and the `source` they were chunked from. A sync
+    reads only those two columns from the table, embeds and merge-inserts the chunks whose id
+    is new, deletes rows that are no longer produced (edited chunks and vanished sources) and
+    leaves every other row untouched.
+
+    Args:
+        table: LanceDB table whose schema has id, source, text and vector columns
+        pipeline: Embedding stage used for new chunks
+        id_column: Name of the chunk id column
+        source_column: Name of the source column
+    """
+
+    def __init__(
+        self,
+        table,
+        pipeline: EmbeddingPipeline,
+        id_column: str = "id",
+        source_column: str = "source",
+    ):
+        missing = {id_column, source_column} - set(table.schema.names)
+        if missing:
+            raise ValueError(
+                f"Table has no {', '.join(sorted(missing))} column(s) to sync on; recreate it "
+                "with the current schema (e.g. delete data/lancedb and re-run 3-embedding.py)"
+            )
+        self.table = table
+        self.pipeline = pipeline
+        self.id_column = id_column
+        self.source_column = source_column
+        self.stats = IngestStats()
+
+    def _existing(self) -> Dict[str, str]:
+        """Map of chunk id to source for every row, without reading vectors."""
+        count = self.table.count_rows()
+        if not count:
+            return {}
+        existing = (
+            self.table.search()
+            .select([self.id_column, self.source_column])
+            .limit(count)
+            .to_arrow()
+        )
+        return dict(
+            zip(
+                existing[self.id_column].to_pylist(),
+                existing[self.source_column].to_pylist(),
+            )
+        )
+
+    def _delete(self, column: str, values: List[str]) -> None:
+        for offset in range(0, len(values), DELETE_BATCH_SIZE):
+            batch = values[offset : offset + DELETE_BATCH_SIZE]
+            self.table.delete(f"{column} IN ({', '.join(_quote(value) for value in batch)})")
+
+    def sync(self, rows: List[dict], sources: Optional[Collection[str]] = None) -> IngestStats:
+        """Bring the table in line with `rows`.
+
+        Args:
+            rows: Chunk rows with id, source and text, plus any other table columns.
+                Rows with an id that was already seen in `rows` are ignored.
+            sources: Sources this sync is authoritative for. Rows of other sources are kept
+                as they are, which allows syncing part of a corpus. By default `rows` is
+                treated as the whole corpus, so sources missing from it are deleted.
+
+        Returns:
+            Counts of inserted, deleted and unchanged chunks
+        """
+        self.stats = IngestStats()
+        self.pipeline.stats = EmbeddingStats()
+        start = time.perf_counter()
+        existing = self._existing()
+
+        wanted: Dict[str, dict] = {}
+        for row in rows:
+            wanted.setdefault(row[self.id_column], row)
+
+        new_rows = [row for row_id, row in wanted.items() if row_id not in existing]
+        if new_rows:
+            schema = self.table.schema
+            self.table.merge_insert(self.id_column).when_not_matched_insert_all().execute(
+                pa.RecordBatchReader.from_batches(
+                    schema, self.pipeline.record_batches(new_rows, schema)
+                )
+            )
+
+        # Whole sources that vanished are deleted with one predicate per batch of sources
+        live_sources = {row[self.source_column] for row in wanted.values()}
+        vanished_sources = {
+            source
+            for source in existing.values()
+            if source not in live_sources and (sources is None or source in sources)
+        }
+        stale_ids = [
+            row_id
+            for row_id, source in existing.items()
+            if row_id not in wanted
+            and source in live_sources
+            and (sources is None or source in sources)
+        ]
+        self._delete(self.source_column, sorted(vanished_sources))
+        self._delete(self.id_column, stale_ids)
+
+        self.stats.inserted = len(new_rows)
+        self.stats.deleted = len(stale_ids) + sum(
+            1 for source in existing.values() if source in vanished_sources
+        )
+        self.stats.unchanged = len(wanted) - len(new_rows)
+        self.stats.elapsed = time.perf_counter() - start
+        return self.stats
@@ -0,0 +1,141 @@
+import queue
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.embedding import Embedder
+
+
+def normalize_query(query: str) -> str:
+    """Cache key of a query: case, spacing and trailing punctuation do not matter."""
+    normalized = unicodedata.normalize("NFC", " ".join(query.split())).casefold()
+    return normalized.rstrip("?!. ")
+
+
+@dataclass
+class QueryEmbeddingStats:
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    batches: int = 0
+
+    def __str__(self) -> str:
+        total = self.hits + self.misses
+        hit_rate = self.hits / total if total else 0.0
+        return (
+            f"Query embeddings: {self.hits} hits, {self.misses} misses ({hit_rate:.0%} hit rate), "
+            f"{self.coalesced} coalesced, {self.batches} batches"
+        )
+
+
+class QueryEmbedder:
+    """Embeds search queries with an LRU/TTL cache and a micro-batcher.
+
+    Repeated queries (after `normalize_query`) are answered from memory without a network
+    call. Cache misses are queued and a background thread sends everything that arrives
+    within `max_wait` seconds as one embeddings request; concurrent requests for the same
+    query share a single pending result.
+
+    Instances are thread safe and callable, so one can be passed as `embed_query` to
+    `HybridRetriever` and shared across sessions. Returned vectors are read-only; copy one
+    before modifying it.
+
+    Args:
+        embedder: Model used for cache misses; must match the table's embedding model
+        cache_size: Number of query vectors kept
+        ttl: Seconds a cached vector stays valid
+        max_batch_size: Queries per embeddings request
+        max_wait: Seconds the batcher waits for more queries after the first one arrives
+    """
+
+    def __init__(
+        self,
+        embedder: Embedder,
+        cache_size: int = 4096,
+        ttl: float = 3600.0,
+        max_batch_size: int = 64,
+        max_wait: float = 0.005,
+    ):
+        self.embedder = embedder
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.stats = QueryEmbeddingStats()
+        self._cache: OrderedDict = OrderedDict()
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+
+    def __call__(self, query: str) -> np.ndarray:
+        return self.embed(query)
+
+    def embed(self, query: str) -> np.ndarray:
+        key = normalize_query(query)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._cache.move_to_end(key)
+                self.stats.hits += 1
+                return entry[1]
+
+            future = self._pending.get(key)
+            if future is not None:
+                self.stats.coalesced += 1
+            else:
+                self.stats.misses += 1
+                future = self._pending[key] = Future()
+                self._queue.put((key, query))
+                if self._worker is None:
+                    self._worker = threading.Thread(
+                        target=self._run, name="query-embedding", daemon=True
+                    )
+                    self._worker.start()
+        return future.result()
+
+    def _next_batch(self) -> List[Tuple[str, str]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            try:
+                vectors = np.array(
+                    self.embedder.embed([query for _, query in batch]), dtype=np.float32
+                )
+                # Cached vectors are shared by every later hit, so callers get read-only views
+                vectors.setflags(write=False)
+                error = None
+            except Exception as e:
+                error = e
+
+            with self._lock:
+                self.stats.batches += 1
+                expires_at = time.monotonic() + self.ttl
+                for i, (key, _) in enumerate(batch):
+                    future = self._pending.pop(key)
+                    if error is not None:
+                        future.set_exception(error)
+                        continue
+                    self._cache[key] = (expires_at, vectors[i])
+                    self._cache.move_to_end(key)
+                    future.set_result(vectors[i])
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
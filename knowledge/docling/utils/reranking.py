@@ -0,0 +1,95 @@
+import re
+from collections import Counter
+from dataclasses import dataclass, replace
+from typing import List, Sequence
+
+import numpy as np
+import pyarrow as pa
+
+from utils.retrieval import SearchResult
+
+# Words, keeping dotted section numbers such as "3.2.1" together
+_TOKEN = re.compile(r"\w+(?:\.\w+)*")
+
+
+def terms(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def _min_max(values: np.ndarray) -> np.ndarray:
+    spread = values.max() - values.min()
+    return (values - values.min()) / spread if spread > 0 else np.zeros_like(values)
+
+
+@dataclass
+class Reranker:
+    """Cheap second-stage reranker that needs no extra model call.
+
+    Scores an over-fetched candidate set with three vectorized features combined with the
+    weights below: cosine similarity to the query vector and BM25 over the query terms (with
+    IDF taken from the candidates themselves), both min-max normalized across the candidates,
+    and the share of query terms found in the section title, which is already in [0, 1] and
+    is left unnormalized so a weak partial match is not stretched to a full one.
+
+    Args:
+        candidates: Results fetched from the first stage before reranking
+        vector_weight: Weight of vector similarity
+        bm25_weight: Weight of BM25 term overlap
+        heading_weight: Weight of the section title match
+        k1: BM25 term frequency saturation
+        b: BM25 length normalization
+    """
+
+    candidates: int = 50
+    vector_weight: float = 1.0
+    bm25_weight: float = 0.6
+    heading_weight: float = 0.3
+    k1: float = 1.2
+    b: float = 0.75
+
+    def scores(self, query: str, query_vector: Sequence[float], table: pa.Table) -> np.ndarray:
+        """Rerank score of every row of a result table with text, metadata and vector columns."""
+        vectors = table.column("vector").combine_chunks()
+        matrix = vectors.flatten().to_numpy().reshape(len(table), vectors.type.list_size)
+        query_vector = np.asarray(query_vector, dtype=np.float32)
+        similarity = matrix @ query_vector / (
+            np.linalg.norm(matrix, axis=1) * np.linalg.norm(query_vector) + 1e-12
+        )
+
+        query_terms = list(dict.fromkeys(terms(query)))
+        texts = [terms(text) for text in table.column("text").to_pylist()]
+        counts = [Counter(text) for text in texts]
+        # Term frequency matrix restricted to the query terms: candidates x query terms
+        tf = np.array([[count[term] for term in query_terms] for count in counts], dtype=float)
+        tf = tf.reshape(len(table), len(query_terms))
+        lengths = np.array([len(text) for text in texts], dtype=float)
+        df = (tf > 0).sum(axis=0)
+        idf = np.log1p((len(table) - df + 0.5) / (df + 0.5))
+        norm = self.k1 * (1 - self.b + self.b * lengths / max(lengths.mean(), 1.0))
+        bm25 = (idf * tf * (self.k1 + 1) / (tf + norm[:, None])).sum(axis=1)
+
+        titles = table.column("metadata").combine_chunks().field("title").to_pylist()
+        query_term_set = set(query_terms)
+        heading = np.array(
+            [
+                len(query_term_set.intersection(terms(title or ""))) / max(len(query_term_set), 1)
+                for title in titles
+            ]
+        )
+
+        return (
+            self.vector_weight * _min_max(similarity)
+            + self.bm25_weight * _min_max(bm25)
+            + self.heading_weight * heading
+        )
+
+    def rerank(
+        self, query: str, query_vector: Sequence[float], table: pa.Table, limit: int
+    ) -> List[SearchResult]:
+        """Top results by rerank score, which replaces the first-stage score."""
+        if len(table) == 0:
+            return []
+        scores = self.scores(query, query_vector, table)
+        order = np.argsort(-scores, kind="stable")[:limit]
+        results = SearchResult.from_arrow(table.take(order))
+        return [replace(result, score=float(scores[i])) for result, i in zip(results, order)]
@@ -0,0 +1,197 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence
+
+import pyarrow as pa
+
+from utils.vector_index import SearchParams
+
+if TYPE_CHECKING:
+    from utils.reranking import Reranker
+
+FTS_COLUMNS = ("text", "metadata.title")
+
+
+@dataclass
+class SearchResult:
+    """One retrieved chunk with its relevance score and source metadata."""
+
+    id: str
+    text: str
+    score: float
+    filename: Optional[str] = None
+    page_numbers: Optional[List[int]] = None
+    title: Optional[str] = None
+
+    @property
+    def source(self) -> str:
+        """Citation such as 'report.pdf - p. 3, 4'."""
+        source_parts = []
+        if self.filename:
+            source_parts.append(self.filename)
+        if self.page_numbers:
+            source_parts.append(f"p. {', '.join(str(p) for p in self.page_numbers)}")
+        return " - ".join(source_parts)
+
+    @classmethod
+    def from_arrow(
+        cls, table: pa.Table, score_column: str = "_relevance_score"
+    ) -> List["SearchResult"]:
+        """Build results column by column, without going through pandas or per-row dicts."""
+        metadata = table.column("metadata").combine_chunks()
+        columns = [
+            table.column("id").to_pylist(),
+            table.column("text").to_pylist(),
+            table.column(score_column).to_pylist(),
+            metadata.field("filename").to_pylist(),
+            metadata.field("page_numbers").to_pylist(),
+            metadata.field("title").to_pylist(),
+        ]
+        return [cls(*values) for values in zip(*columns)]
+
+
+def ensure_fts_index(table, columns: Sequence[str] = FTS_COLUMNS, replace: bool = False) -> None:
+    """Create the full-text (BM25) indexes that hybrid search needs, one per column.
+
+    Run this after every ingest. Columns without an index get one; if any index already
+    existed, `table.optimize()` folds rows inserted or deleted since it was built into it.
+    Until then, full-text search still finds new rows, by scanning them unindexed.
+    """
+    indexed = {column for index in table.list_indices() for column in index.columns}
+    rebuilt = [column for column in columns if replace or column not in indexed]
+    for column in rebuilt:
+        table.create_fts_index(column, replace=True)
+    if len(rebuilt) < len(columns):
+        table.optimize()
+
+
+def reciprocal_rank_fusion(rankings: Sequence[List[str]], k: int = 60) -> Dict[str, float]:
+    """Fuse ranked id lists: each list contributes 1 / (k + rank) to an id's score.
+
+    RRF only looks at ranks, so BM25 and vector distances never need to be calibrated
+    against each other.
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, row_id in enumerate(ranking, start=1):
+            scores[row_id] = scores.get(row_id, 0.0) + 1.0 / (k + rank)
+    return scores
+
+
+class HybridRetriever:
+    """Vector plus BM25 retrieval over a docling LanceDB table, fused with RRF.
+
+    Vector search finds paraphrases, while full-text search over the chunk text and section
+    title catches exact terms such as section numbers and product names. The full-text query
+    runs on the retriever's thread pool while the calling thread embeds the query and runs
+    the vector search, so a hybrid query costs about as much as the slower of the two and
+    never holds a pool thread while the query is being embedded.
+
+    Args:
+        table: LanceDB table with id, text, metadata and vector columns
+        embed_query: Function returning the query vector. By default the query string is
+            passed to LanceDB, which embeds it with the table's embedding function.
+        search_params: nprobes/refine_factor for the vector query
+        fts_columns: Columns searched by the full-text query
+        columns: Columns returned for each result
+        candidates: Results fetched from each retriever before fusion
+        rrf_k: RRF smoothing constant; larger values flatten the rank weights
+        reranker: Optional second stage applied by `retrieve` to `reranker.candidates`
+            fused results. Needs `embed_query`, since it compares vectors locally.
+        max_workers: Threads running full-text queries; at most this many searches overlap
+            their full-text half, so size it to the number of concurrent searches
+    """
+
+    def __init__(
+        self,
+        table,
+        embed_query: Optional[Callable[[str], Sequence[float]]] = None,
+        search_params: Optional[SearchParams] = None,
+        fts_columns: Sequence[str] = FTS_COLUMNS,
+        columns: Sequence[str] = ("id", "text", "metadata"),
+        candidates: int = 20,
+        rrf_k: int = 60,
+        reranker: Optional["Reranker"] = None,
+        max_workers: int = 4,
+    ):
+        if reranker is not None and embed_query is None:
+            raise ValueError("Reranking needs embed_query to compare query and chunk vectors")
+        self.table = table
+        self.embed_query = embed_query
+        self.search_params = search_params or SearchParams()
+        self.fts_columns = list(fts_columns)
+        self.columns = list(columns)
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+        self.reranker = reranker
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="retrieval"
+        )
+
+    def vector_search(
+        self,
+        query: str,
+        limit: int,
+        columns: Optional[List[str]] = None,
+        query_vector: Optional[Sequence[float]] = None,
+    ) -> pa.Table:
+        if query_vector is None:
+            query_vector = self.embed_query(query) if self.embed_query else query
+        builder = self.table.search(query_vector, query_type="vector")
+        builder = self.search_params.apply(builder).select(columns or self.columns)
+        return builder.limit(limit).to_arrow()
+
+    def fts_search(self, query: str, limit: int, columns: Optional[List[str]] = None) -> pa.Table:
+        return (
+            self.table.search(query, query_type="fts", fts_columns=self.fts_columns)
+            .select(columns or self.columns)
+            .limit(limit)
+            .to_arrow()
+        )
+
+    def search(
+        self,
+        query: str,
+        limit: int = 5,
+        with_vectors: bool = False,
+        query_vector: Optional[Sequence[float]] = None,
+    ) -> pa.Table:
+        """Top results by fused rank, with their RRF score in `_relevance_score`."""
+        candidates = max(self.candidates, limit)
+        columns = self.columns + ["vector"] if with_vectors else self.columns
+        fts_future = self._executor.submit(self.fts_search, query, candidates, columns)
+        vector_hits = self.vector_search(query, candidates, columns, query_vector)
+        hits = [vector_hits.select(columns), fts_future.result().select(columns)]
+
+        scores = reciprocal_rank_fusion([table["id"].to_pylist() for table in hits], k=self.rrf_k)
+        top = sorted(scores, key=scores.get, reverse=True)[:limit]
+
+        # Take each id's row from whichever result set returned it first
+        combined = pa.concat_tables(hits)
+        first_row: Dict[str, int] = {}
+        for row, row_id in enumerate(combined["id"].to_pylist()):
+            first_row.setdefault(row_id, row)
+        results = combined.take([first_row[row_id] for row_id in top])
+        return results.replace_schema_metadata(None).append_column(
+            "_relevance_score", pa.array([scores[row_id] for row_id in top], pa.float64())
+        )
+
+    def retrieve(self, query: str, limit: int = 5) -> List[SearchResult]:
+        """Like `search`, but as typed results, reranked if a reranker is set."""
+        if self.reranker is None:
+            return SearchResult.from_arrow(self.search(query, limit))
+        query_vector = self.embed_query(query)
+        limit_before = max(self.reranker.candidates, limit)
+        candidates = self.search(query, limit_before, with_vectors=True, query_vector=query_vector)
+        return self.reranker.rerank(query, query_vector, candidates, limit)
+
+
+def format_context(results: Sequence[SearchResult]) -> str:
+    """Concatenate result chunks into a prompt context, each followed by its source citation."""
+    contexts = []
+    for result in results:
+        context = f"{result.text}\nSource: {result.source}"
+        if result.title:
+            context += f"\nTitle: {result.title}"
+        contexts.append(context)
+    return "\n\n".join(contexts)
@@ -1,58 +1,214 @@
+import gzip
+import hashlib
+import io
+import queue
+import threading
 import xml.etree.ElementTree as ET
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime, timezone
+from typing import IO, Iterator, List, Optional, Tuple
 from urllib.parse import urljoin
 
 import requests
 
+# Sentinel a worker puts on the queue when it finished one sitemap
+_SITEMAP_DONE = object()
 
-def get_sitemap_urls(base_url: str, sitemap_filename: str = "sitemap.xml") -> List[str]:
-    """Fetches and parses a sitemap XML file to extract URLs.
+
+def _local_name(tag: str) -> str:
+    """Strip the XML namespace, e.g. '{http://www.sitemaps.org/...}loc' -> 'loc'."""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _parse_lastmod(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _open_sitemap(sitemap_url: str) -> Optional[Tuple[requests.Response, IO[bytes]]]:
+    """Open a sitemap as a byte stream, transparently decompressing gzip.
+
+    Returns:
+        The response and a readable stream over its body, or None if the sitemap does not
+        exist (404). Closing the stream does not close the response; close both.
+    """
+    response = requests.get(sitemap_url, timeout=10, stream=True)
+    if response.status_code == 404:
+        response.close()
+        return None
+    try:
+        response.raise_for_status()
+
+        # Undo Content-Encoding, then sniff the gzip magic bytes for .xml.gz files
+        response.raw.decode_content = True
+        response.raw.auto_close = False  # Buffered/gzip readers probe past EOF
+        stream = io.BufferedReader(response.raw)
+        if stream.peek(2)[:2] == b"\x1f\x8b":
+            return response, gzip.GzipFile(fileobj=stream)
+        return response, stream
+    except BaseException:
+        # The caller only closes the response on success
+        response.close()
+        raise
+
+
+def _iter_sitemap_entries(stream: IO[bytes]) -> Iterator[Tuple[str, str, Optional[datetime]]]:
+    """Incrementally parse a <urlset> or <sitemapindex> document.
+
+    Yields:
+        Tuples of (entry kind, location, last modified) where kind is 'url' or 'sitemap'
+    """
+    root = None
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = elem
+            continue
+
+        kind = _local_name(elem.tag)
+        if kind not in ("url", "sitemap"):
+            continue
+
+        loc, lastmod = None, None
+        for child in elem:
+            name = _local_name(child.tag)
+            if name == "loc" and child.text:
+                loc = child.text.strip()
+            elif name == "lastmod":
+                lastmod = _parse_lastmod(child.text)
+        if loc:
+            yield kind, loc, lastmod
+
+        # Drop parsed entries so memory stays flat regardless of sitemap size
+        root.clear()
+
+
+def iter_sitemap_urls(
+    base_url: str,
+    sitemap_filename: str = "sitemap.xml",
+    modified_since: Optional[datetime] = None,
+    max_workers: int = 4,
+) -> Iterator[str]:
+    """Stream page URLs from a sitemap, following nested sitemap indexes concurrently.
+
+    Sitemaps are parsed incrementally (gzipped or not), so memory does not grow with sitemap
+    size; only a compact digest of each URL is kept to drop duplicates.
 
     Args:
         base_url: The base URL of the website
         sitemap_filename: The filename of the sitemap (default: sitemap.xml)
+        modified_since: Only yield URLs (and follow child sitemaps) whose lastmod is newer.
+            Entries without a lastmod are always included.
+        max_workers: Number of sitemaps fetched in parallel
 
-    Returns:
-        List of URLs found in the sitemap. If sitemap is not found, returns a list
-        containing only the base URL.
+    Yields:
+        Unique page URLs. If the sitemap is not found, yields only the base URL.
 
     Raises:
-        ValueError: If there's an error fetching (except 404) or parsing the sitemap
+        ValueError: If there's an error fetching (except 404) or parsing a sitemap
     """
+    sitemap_url = urljoin(base_url, sitemap_filename)
+    if modified_since and not modified_since.tzinfo:
+        modified_since = modified_since.replace(tzinfo=timezone.utc)
+
+    results: queue.Queue = queue.Queue(maxsize=1000)
+    stop = threading.Event()
+    lock = threading.Lock()
+    scheduled = set()
+    pending = 0
+
+    def put(item) -> None:
+        # Time out regularly so workers notice when the consumer stopped early
+        while not stop.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def crawl(url: str) -> None:
+        try:
+            opened = _open_sitemap(url)
+            if opened is None:
+                if url == sitemap_url:
+                    put(base_url.rstrip("/"))
+                return
+            response, stream = opened
+            # GzipFile leaves its file object open, and auto_close is off, so the
+            # response (and its pooled connection) is closed explicitly
+            with closing(response), stream:
+                for kind, loc, lastmod in _iter_sitemap_entries(stream):
+                    if stop.is_set():
+                        return
+                    if modified_since and lastmod and lastmod <= modified_since:
+                        continue
+                    if kind == "sitemap":
+                        schedule(loc)
+                    else:
+                        put(loc)
+        except requests.RequestException as e:
+            put(ValueError(f"Failed to fetch sitemap: {str(e)}"))
+        except ET.ParseError as e:
+            put(ValueError(f"Failed to parse sitemap XML: {str(e)}"))
+        except Exception as e:
+            put(ValueError(f"Unexpected error processing sitemap: {str(e)}"))
+        finally:
+            put(_SITEMAP_DONE)
+
+    def schedule(url: str) -> None:
+        nonlocal pending
+        with lock:
+            if url in scheduled:
+                return
+            scheduled.add(url)
+            pending += 1
+        executor.submit(crawl, url)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    seen = set()
     try:
-        sitemap_url = urljoin(base_url, sitemap_filename)
+        schedule(sitemap_url)
+        while True:
+            with lock:
+                if pending == 0:
+                    break
+            item = results.get()
+            if item is _SITEMAP_DONE:
+                with lock:
+                    pending -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                digest = hashlib.blake2b(item.encode(), digest_size=8).digest()
+                if digest not in seen:
+                    seen.add(digest)
+                    yield item
+    finally:
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
 
-        # Fetch sitemap URL
-        response = requests.get(sitemap_url, timeout=10)
 
-        # # Return just the base URL if sitemap not found
-        if response.status_code == 404:
-            return [base_url.rstrip("/")]
-
-        response.raise_for_status()
-
-        # Parse XML content
-        root = ET.fromstring(response.content)
-
-        # Handle different XML namespaces that sitemaps might use
-        namespaces = (
-            {"ns": root.tag.split("}")[0].strip("{")} if "}" in root.tag else ""
-        )
+def get_sitemap_urls(base_url: str, sitemap_filename: str = "sitemap.xml") -> List[str]:
+    """Fetches and parses a sitemap XML file to extract URLs.
 
-        # Extract URLs using namespace if present
-        if namespaces:
-            urls = [elem.text for elem in root.findall(".//ns:loc", namespaces)]
-        else:
-            urls = [elem.text for elem in root.findall(".//loc")]
+    Args:
+        base_url: The base URL of the website
+        sitemap_filename: The filename of the sitemap (default: sitemap.xml)
 
-        return urls
+    Returns:
+        List of URLs found in the sitemap. If sitemap is not found, returns a list
+        containing only the base URL.
 
-    except requests.RequestException as e:
-        raise ValueError(f"Failed to fetch sitemap: {str(e)}")
-    except ET.ParseError as e:
-        raise ValueError(f"Failed to parse sitemap XML: {str(e)}")
-    except Exception as e:
-        raise ValueError(f"Unexpected error processing sitemap: {str(e)}")
+    Raises:
+        ValueError: If there's an error fetching (except 404) or parsing the sitemap
+    """
+    return list(iter_sitemap_urls(base_url, sitemap_filename))
 
 
 if __name__ == "__main__":
@@ -1,32 +1,144 @@
-from typing import Dict, List, Tuple
+import hashlib
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+from threading import Lock
+from typing import Iterator, List, Optional, Tuple
 
-from tiktoken import get_encoding
+from tiktoken import Encoding, get_encoding
 from transformers.tokenization_utils_base import PreTrainedTokenizerBase
 
 
+class TokenIds(Sequence):
+    """Token list returned by `tokenize`: `len()` is O(1) and tokens are only encoded on access.
+
+    HybridChunker only counts tokens, so neither the ids nor one `str` per token are built
+    unless something indexes into the list.
+    """
+
+    __slots__ = ("_text", "_count", "_encoding", "_ids")
+
+    def __init__(self, text: str, count: int, encoding: Encoding):
+        self._text = text
+        self._count = count
+        self._encoding = encoding
+        self._ids: Optional[List[int]] = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):
+        if self._ids is None:
+            self._ids = self._encoding.encode_ordinary(self._text)
+        if isinstance(index, slice):
+            return [str(t) for t in self._ids[index]]
+        return str(self._ids[index])
+
+
+class TokenVocab(Mapping):
+    """Read-only vocabulary view mapping token strings ('0', '1', ...) to their ids.
+
+    The wrapper's token strings are just the ids, so lookups are computed and nothing is
+    stored, no matter how often HuggingFace code asks for the vocabulary.
+    """
+
+    __slots__ = ("_size",)
+
+    def __init__(self, size: int):
+        self._size = size
+
+    def __getitem__(self, token: str) -> int:
+        if isinstance(token, str) and token.isdecimal():
+            index = int(token)
+            # Reject non-canonical spellings such as '007'
+            if index < self._size and str(index) == token:
+                return index
+        raise KeyError(token)
+
+    def __iter__(self) -> Iterator[str]:
+        return map(str, range(self._size))
+
+    def __len__(self) -> int:
+        return self._size
+
+
 # Create a wrapper class to make OpenAI's tokenizer compatible with the HybridChunker interface
 class OpenAITokenizerWrapper(PreTrainedTokenizerBase):
     """Minimal wrapper for OpenAI's tokenizer."""
 
     def __init__(
-        self, model_name: str = "cl100k_base", max_length: int = 8191, **kwargs
+        self,
+        model_name: str = "cl100k_base",
+        max_length: int = 8191,
+        cache_size: int = 65536,
+        **kwargs,
     ):
         """Initialize the tokenizer.
 
         Args:
             model_name: The name of the OpenAI encoding to use
             max_length: Maximum sequence length
+            cache_size: Number of distinct texts whose token counts are memoized
         """
         super().__init__(model_max_length=max_length, **kwargs)
         self.tokenizer = get_encoding(model_name)
         self._vocab_size = self.tokenizer.max_token_value
+        self._vocab = TokenVocab(self._vocab_size)
+        self._cache_size = cache_size
+        # Keyed by a 16-byte digest of the text, so an entry costs ~100 bytes however long
+        # the text is
+        self._count_cache: OrderedDict = OrderedDict()
+        self._count_cache_lock = Lock()
+
+    @staticmethod
+    def _cache_key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+    def _remember(self, key: bytes, count: int) -> None:
+        with self._count_cache_lock:
+            self._count_cache[key] = count
+            if len(self._count_cache) > self._cache_size:
+                self._count_cache.popitem(last=False)
 
-    def tokenize(self, text: str, **kwargs) -> List[str]:
+    def count_tokens(self, text: str) -> int:
+        """Number of tokens in text, reusing counts of text spans seen before (LRU memoized)."""
+        key = self._cache_key(text)
+        with self._count_cache_lock:
+            count = self._count_cache.get(key)
+            if count is not None:
+                self._count_cache.move_to_end(key)
+                return count
+        count = len(self.tokenizer.encode_ordinary(text))
+        self._remember(key, count)
+        return count
+
+    def count_tokens_batch(self, texts: List[str], num_threads: int = 8) -> List[int]:
+        """Count tokens for many texts, encoding the unseen ones across threads.
+
+        A standalone helper for callers that have many texts up front; HybridChunker counts
+        one span at a time through `tokenize`.
+        """
+        keys = [self._cache_key(text) for text in texts]
+        with self._count_cache_lock:
+            counts = {key: self._count_cache[key] for key in keys if key in self._count_cache}
+        missing = {key: text for key, text in zip(keys, texts) if key not in counts}
+        encoded = self.tokenizer.encode_ordinary_batch(
+            list(missing.values()), num_threads=num_threads
+        )
+        for key, ids in zip(missing, encoded):
+            counts[key] = len(ids)
+            self._remember(key, len(ids))
+        return [counts[key] for key in keys]
+
+    def tokenize(self, text: str, **kwargs) -> TokenIds:
         """Main method used by HybridChunker."""
-        return [str(t) for t in self.tokenizer.encode(text)]
+        return TokenIds(text, self.count_tokens(text), self.tokenizer)
+
+    def encode(self, text: str, **kwargs) -> List[int]:
+        """Return token ids directly instead of going through string tokens."""
+        return self.tokenizer.encode_ordinary(text)
 
     def _tokenize(self, text: str) -> List[str]:
-        return self.tokenize(text)
+        return list(self.tokenize(text))
 
     def _convert_token_to_id(self, token: str) -> int:
         return int(token)
@@ -34,8 +146,8 @@ class OpenAITokenizerWrapper(PreTrainedTokenizerBase):
     def _convert_id_to_token(self, index: int) -> str:
         return str(index)
 
-    def get_vocab(self) -> Dict[str, int]:
-        return dict(enumerate(range(self.vocab_size)))
+    def get_vocab(self) -> Mapping[str, int]:
+        return self._vocab
 
     @property
     def vocab_size(self) -> int:
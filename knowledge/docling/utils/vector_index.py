@@ -0,0 +1,88 @@
+import math
+from dataclasses import dataclass
+from typing import Optional
+
+# Below this many rows a brute-force scan is fast enough and an index is not worth building
+DEFAULT_MIN_ROWS = 50_000
+
+
+@dataclass
+class SearchParams:
+    """Recall/latency knobs for queries against an IVF index.
+
+    Args:
+        nprobes: IVF partitions searched per query. Higher is more accurate and slower.
+        refine_factor: Re-rank `limit * refine_factor` candidates with exact distances,
+            which recovers most of the recall lost to PQ compression. None disables it.
+    """
+
+    nprobes: int = 20
+    refine_factor: Optional[int] = None
+
+    def apply(self, query):
+        """Apply the settings to a LanceDB vector query builder."""
+        query = query.nprobes(self.nprobes)
+        if self.refine_factor:
+            query = query.refine_factor(self.refine_factor)
+        return query
+
+
+def _num_sub_vectors(ndims: int) -> int:
+    # 8 dimensions per sub-vector keeps PQ error low while staying SIMD friendly;
+    # the sub-vector count must divide ndims
+    for dims_per_sub_vector in (8, 4, 2, 1):
+        if ndims % dims_per_sub_vector == 0:
+            return ndims // dims_per_sub_vector
+    return ndims
+
+
+def has_vector_index(table, vector_column: str = "vector") -> bool:
+    return any(vector_column in index.columns for index in table.list_indices())
+
+
+def ensure_vector_index(
+    table,
+    min_rows: int = DEFAULT_MIN_ROWS,
+    index_type: str = "IVF_PQ",
+    metric: str = "l2",
+    vector_column: str = "vector",
+    replace: bool = False,
+) -> bool:
+    """Build an ANN index on the vector column once the table is large enough.
+
+    Run this after every ingest. The first call above `min_rows` trains the index. Later
+    calls fold newly inserted rows into the existing index with `optimize()` instead of
+    retraining, unless `replace` is set.
+
+    OpenAI embeddings are unit length, so L2 and cosine distance rank results identically;
+    L2 also matches the default metric of `table.search()`.
+
+    Args:
+        table: LanceDB table to index
+        min_rows: Row count above which the index is built
+        index_type: "IVF_PQ", or an HNSW variant such as "IVF_HNSW_SQ"
+        metric: Distance metric of the index
+        vector_column: Name of the vector column
+        replace: Retrain the index even if one exists
+
+    Returns:
+        True if the table has a vector index after the call
+    """
+    rows = table.count_rows()
+    if has_vector_index(table, vector_column) and not replace:
+        table.optimize()
+        return True
+    if rows < min_rows:
+        return False
+
+    ndims = table.schema.field(vector_column).type.list_size
+    table.create_index(
+        metric=metric,
+        # ~sqrt(rows) partitions keeps both partition scans and centroid lookups small
+        num_partitions=max(1, round(math.sqrt(rows))),
+        num_sub_vectors=_num_sub_vectors(ndims),
+        vector_column_name=vector_column,
+        index_type=index_type,
+        replace=True,
+    )
+    return True
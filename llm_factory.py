@@ -1,61 +1,1129 @@
-from collections.abc import Generator
-from typing import Any, Literal, Protocol, overload
+from __future__ import annotations
+
+import hashlib
+import importlib
+import json
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict, defaultdict, deque
+from collections.abc import AsyncGenerator, AsyncIterator, Generator, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, ClassVar, Literal, Protocol, overload
 
-import instructor
-from anthropic import Anthropic
-from openai import OpenAI
 from pydantic import BaseModel
 
 from api.custom_types import LiteralFalse, LiteralTrue
 from api.settings import AnthropicSettings, OllamaSettings, OpenAISettings, get_settings
 
+# Provider SDKs, and stdlib modules only some features need, are imported on first use so
+# short-lived processes only pay for what they call
+if TYPE_CHECKING:
+    import asyncio
+
+    import httpx
+    import instructor
+
 type LLMProviders = Literal["ollama", "openai", "anthropic"]
 type LLMSettings = OpenAISettings | AnthropicSettings | OllamaSettings
 
+DEFAULT_MAX_CONCURRENCY = 64
+DEFAULT_BATCH_CONCURRENCY = 16
+DEFAULT_ENCODING = "cl100k_base"
+HEDGE_MIN_SAMPLES = 20
+
+PROVIDER_SDKS: dict[LLMProviders, str] = {"openai": "openai", "anthropic": "anthropic", "ollama": "openai"}
+
 
 class ClientInitializerCallback(Protocol):
     def __call__(self, settings: LLMSettings) -> instructor.Instructor: ...
 
 
+class AsyncClientInitializerCallback(Protocol):
+    def __call__(self, settings: LLMSettings, http_client: httpx.AsyncClient) -> instructor.AsyncInstructor: ...
+
+
 type ClientInitializer = dict[LLMProviders, ClientInitializerCallback]
+type AsyncClientInitializer = dict[LLMProviders, AsyncClientInitializerCallback]
+
+
+def preload_provider(provider: LLMProviders) -> None:
+    """Import Instructor and the provider SDK up front, e.g. while a server is warming up."""
+    importlib.import_module("instructor")
+    importlib.import_module(PROVIDER_SDKS[provider])
+
+
+@cache
+def _provider_settings(provider: LLMProviders) -> LLMSettings:
+    return getattr(get_settings(), provider)
+
+
+def _openai_client(settings: LLMSettings) -> instructor.Instructor:
+    import instructor
+    from openai import OpenAI
+
+    return instructor.from_openai(OpenAI(api_key=settings.api_key))
+
+
+def _anthropic_client(settings: LLMSettings) -> instructor.Instructor:
+    import instructor
+    from anthropic import Anthropic
+
+    return instructor.from_anthropic(Anthropic(api_key=settings.api_key))
+
+
+def _ollama_client(settings: LLMSettings) -> instructor.Instructor:
+    import instructor
+    from openai import OpenAI
+
+    return instructor.from_openai(
+        OpenAI(base_url=settings.base_url, api_key=settings.api_key),  # type: ignore Ollama setting will have `settings.base_url`
+        mode=instructor.Mode.JSON,
+    )
+
+
+def _async_openai_client(settings: LLMSettings, http_client: httpx.AsyncClient) -> instructor.AsyncInstructor:
+    import instructor
+    from openai import AsyncOpenAI
+
+    return instructor.from_openai(AsyncOpenAI(api_key=settings.api_key, http_client=http_client))
+
+
+def _async_anthropic_client(settings: LLMSettings, http_client: httpx.AsyncClient) -> instructor.AsyncInstructor:
+    import instructor
+    from anthropic import AsyncAnthropic
+
+    return instructor.from_anthropic(AsyncAnthropic(api_key=settings.api_key, http_client=http_client))
+
+
+def _async_ollama_client(settings: LLMSettings, http_client: httpx.AsyncClient) -> instructor.AsyncInstructor:
+    import instructor
+    from openai import AsyncOpenAI
+
+    return instructor.from_openai(
+        AsyncOpenAI(base_url=settings.base_url, api_key=settings.api_key, http_client=http_client),  # type: ignore Ollama setting will have `settings.base_url`
+        mode=instructor.Mode.JSON,
+    )
+
+
+class CompletionCache(Protocol):
+    def get(self, key: str) -> str | None: ...
+
+    def set(self, key: str, value: str) -> None: ...
+
+
+class MemoryCache:
+    """Thread-safe in-process LRU cache with an optional time-to-live in seconds."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float | None = None) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+class SQLiteCache:
+    """Disk-backed cache that survives restarts, with an optional time-to-live in seconds."""
+
+    def __init__(self, path: str | Path = ".cache/llm_factory.sqlite", ttl: float | None = None) -> None:
+        import sqlite3
+
+        self.ttl = ttl
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS completions "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            row = self._connection.execute("SELECT value, stored_at FROM completions WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, stored_at = row
+        if self.ttl is not None and time.time() - stored_at > self.ttl:
+            return None
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO completions (key, value, stored_at) VALUES (?, ?, ?)",
+                (key, value, time.time()),
+            )
+
+
+class TieredCache:
+    """Checks each tier in order and back-fills faster tiers on a hit.
+
+    Typical use is `TieredCache(MemoryCache(ttl=3600), SQLiteCache())`.
+    """
+
+    def __init__(self, *tiers: CompletionCache) -> None:
+        self.tiers = tiers
+
+    def get(self, key: str) -> str | None:
+        for index, tier in enumerate(self.tiers):
+            value = tier.get(key)
+            if value is not None:
+                for faster_tier in self.tiers[:index]:
+                    faster_tier.set(key, value)
+                return value
+        return None
+
+    def set(self, key: str, value: str) -> None:
+        for tier in self.tiers:
+            tier.set(key, value)
+
+
+@cache
+def _schema_hash(response_model: type[BaseModel]) -> str:
+    schema = json.dumps(response_model.model_json_schema(), sort_keys=True)
+    return hashlib.sha256(schema.encode()).hexdigest()
+
+
+def _cache_key(provider: LLMProviders, completion_params: dict[str, Any]) -> str:
+    key_params = {
+        "provider": provider,
+        "model": completion_params["model"],
+        "temperature": completion_params["temperature"],
+        "max_tokens": completion_params["max_tokens"],
+        "messages": completion_params["messages"],
+        "schema": _schema_hash(completion_params["response_model"]),
+    }
+    return hashlib.sha256(json.dumps(key_params, sort_keys=True, default=str).encode()).hexdigest()
+
+
+@cache
+def _encoding_for_model(model: str) -> Any:
+    """The model's tiktoken encoding, or None if tiktoken is missing or cannot load it.
+
+    tiktoken downloads BPE files on first use, which fails on offline workers; the None is
+    cached too, so the download is not retried on every call.
+    """
+    try:
+        import tiktoken
+
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception:
+        return None
+
+
+def estimate_tokens(model: str, messages: list[dict[str, str]], max_tokens: int | None = None) -> int:
+    """Prompt tokens plus the completion allowance, which providers count against tokens/minute."""
+    encoding = _encoding_for_model(model)
+    if encoding is not None:
+        count = lambda text: len(encoding.encode(text))  # noqa: E731
+    else:
+        count = lambda text: len(text) // 4  # noqa: E731 Rough estimate without tiktoken
+
+    # Every message carries a few tokens of role and separator overhead
+    prompt_tokens = sum(4 + count(str(message.get("content", ""))) for message in messages)
+    return prompt_tokens + (max_tokens or 0)
+
+
+@dataclass
+class _TokenBucket:
+    capacity: float
+    refill_per_second: float
+    tokens: float
+    updated_at: float
+
+    def delay_for(self, amount: float, now: float) -> float:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_per_second)
+        self.updated_at = now
+        return max(0.0, (min(amount, self.capacity) - self.tokens) / self.refill_per_second)
+
+    def consume(self, amount: float) -> None:
+        self.tokens -= min(amount, self.capacity)
+
+
+@dataclass
+class RateLimiterStats:
+    requests: int = 0
+    delayed: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    @property
+    def average_wait(self) -> float:
+        return self.total_wait / self.requests if self.requests else 0.0
+
+
+class RateLimiter:
+    """Client-side requests/minute and tokens/minute buckets, one pair per (provider, model).
+
+    Callers for the same key are served first-in-first-out, so a burst queues up instead of
+    turning into a storm of 429 retries. Share one instance between factories to share limits.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int) -> None:
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.stats = RateLimiterStats()
+        self._buckets: dict[tuple[str, str], tuple[_TokenBucket, _TokenBucket]] = {}
+        self._condition = threading.Condition()
+        self._next_ticket: defaultdict[tuple[str, str], int] = defaultdict(int)
+        self._now_serving: defaultdict[tuple[str, str], int] = defaultdict(int)
+        self._queue_depths: defaultdict[tuple[str, str], int] = defaultdict(int)
+        self._abandoned_tickets: set[tuple[tuple[str, str], int]] = set()
+        # One FIFO lock per key and event loop; asyncio locks cannot be shared between loops
+        self._async_locks: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[tuple[str, str], asyncio.Lock]] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(self._queue_depths.values())
+
+    def queue_depths(self) -> dict[tuple[str, str], int]:
+        return {key: depth for key, depth in self._queue_depths.items() if depth}
+
+    def _try_acquire(self, key: tuple[str, str], tokens: int) -> float:
+        # Caller holds `self._condition`; returns 0.0 once capacity was taken, else the time to wait
+        if key not in self._buckets:
+            now = time.monotonic()
+            self._buckets[key] = (
+                _TokenBucket(self.requests_per_minute, self.requests_per_minute / 60, self.requests_per_minute, now),
+                _TokenBucket(self.tokens_per_minute, self.tokens_per_minute / 60, self.tokens_per_minute, now),
+            )
+        requests_bucket, tokens_bucket = self._buckets[key]
+        now = time.monotonic()
+        delay = max(requests_bucket.delay_for(1, now), tokens_bucket.delay_for(tokens, now))
+        if delay == 0.0:
+            requests_bucket.consume(1)
+            tokens_bucket.consume(tokens)
+        return delay
+
+    def _record_wait(self, waited: float, delayed: bool) -> None:
+        self.stats.requests += 1
+        self.stats.delayed += delayed
+        self.stats.total_wait += waited
+        self.stats.max_wait = max(self.stats.max_wait, waited)
+
+    def _release_ticket(self, key: tuple[str, str], ticket: int) -> None:
+        # Caller holds `self._condition`; tickets abandoned by interrupted waiters are skipped
+        if ticket != self._now_serving[key]:
+            self._abandoned_tickets.add((key, ticket))
+            return
+        self._now_serving[key] += 1
+        while (key, self._now_serving[key]) in self._abandoned_tickets:
+            self._abandoned_tickets.remove((key, self._now_serving[key]))
+            self._now_serving[key] += 1
+        self._condition.notify_all()
+
+    def acquire(self, provider: str, model: str, tokens: int) -> float:
+        """Block until the request fits the limits; returns the seconds spent waiting."""
+        key = (provider, model)
+        start = time.monotonic()
+        delayed = False
+        with self._condition:
+            ticket = self._next_ticket[key]
+            self._next_ticket[key] += 1
+            self._queue_depths[key] += 1
+            try:
+                while ticket != self._now_serving[key]:
+                    delayed = True
+                    self._condition.wait()
+                while delay := self._try_acquire(key, tokens):
+                    delayed = True
+                    self._condition.wait(delay)
+            finally:
+                self._queue_depths[key] -= 1
+                self._release_ticket(key, ticket)
+            waited = time.monotonic() - start
+            self._record_wait(waited, delayed)
+        return waited
+
+    async def aacquire(self, provider: str, model: str, tokens: int) -> float:
+        """Async variant of `acquire`; waiting tasks are served in arrival order."""
+        import asyncio
+
+        key = (provider, model)
+        start = time.monotonic()
+        with self._condition:
+            locks = self._async_locks.setdefault(asyncio.get_running_loop(), {})
+            lock = locks.setdefault(key, asyncio.Lock())
+            self._queue_depths[key] += 1
+        delayed = lock.locked()
+        try:
+            async with lock:
+                while True:
+                    with self._condition:
+                        delay = self._try_acquire(key, tokens)
+                    if not delay:
+                        break
+                    delayed = True
+                    await asyncio.sleep(delay)
+        finally:
+            with self._condition:
+                self._queue_depths[key] -= 1
+        waited = time.monotonic() - start
+        with self._condition:
+            self._record_wait(waited, delayed)
+        return waited
+
+
+@dataclass
+class CompletionRecord:
+    """Timings and usage of one completion call, handed to every `CompletionHook`.
+
+    `time_to_first_byte` is the time until the first provider response (or partial, when
+    streaming) and `parse_time` the time spent after the last response, mostly Instructor's
+    Pydantic validation. Token counts add up over all attempts.
+    """
+
+    provider: str
+    model: str
+    response_model: str
+    started_at: float = field(default_factory=time.time)
+    latency: float = 0.0
+    time_to_first_byte: float | None = None
+    parse_time: float | None = None
+    rate_limit_wait: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    attempts: int = 0
+    validation_failures: int = 0
+    cached: bool = False
+    error: str | None = None
+    _started: float = field(default_factory=time.perf_counter, repr=False)
+    _last_response_at: float | None = field(default=None, repr=False)
+
+    @property
+    def retries(self) -> int:
+        return max(0, self.attempts - 1)
+
+
+class CompletionHook(Protocol):
+    def __call__(self, record: CompletionRecord) -> None: ...
+
+
+_current_record: ContextVar[CompletionRecord | None] = ContextVar("llm_factory_current_record", default=None)
+
+
+def _on_completion_kwargs(*args: Any, **kwargs: Any) -> None:
+    if record := _current_record.get():
+        record.attempts += 1
+
+
+def _on_completion_response(response: Any, *args: Any, **kwargs: Any) -> None:
+    if record := _current_record.get():
+        now = time.perf_counter()
+        if record.time_to_first_byte is None:
+            record.time_to_first_byte = now - record._started
+        record._last_response_at = now
+
+        # OpenAI reports prompt/completion tokens, Anthropic input/output tokens
+        usage = getattr(response, "usage", None)
+        record.prompt_tokens += getattr(usage, "prompt_tokens", None) or getattr(usage, "input_tokens", None) or 0
+        record.completion_tokens += (
+            getattr(usage, "completion_tokens", None) or getattr(usage, "output_tokens", None) or 0
+        )
+
+
+def _on_parse_error(*args: Any, **kwargs: Any) -> None:
+    if record := _current_record.get():
+        record.validation_failures += 1
+
+
+def _register_instrumentation(client: instructor.Instructor | instructor.AsyncInstructor) -> None:
+    client.on("completion:kwargs", _on_completion_kwargs)
+    client.on("completion:response", _on_completion_response)
+    client.on("parse:error", _on_parse_error)
+
+
+def _new_record(provider: LLMProviders, completion_params: dict[str, Any]) -> CompletionRecord:
+    return CompletionRecord(
+        provider=provider,
+        model=completion_params["model"],
+        response_model=completion_params["response_model"].__name__,
+    )
+
+
+def _finish_record(record: CompletionRecord, hooks: list[CompletionHook]) -> None:
+    now = time.perf_counter()
+    record.latency = now - record._started
+    if record._last_response_at is not None:
+        record.parse_time = now - record._last_response_at
+    for hook in hooks:
+        hook(record)
+
+
+@contextmanager
+def _instrumented(record: CompletionRecord, hooks: list[CompletionHook]) -> Generator[CompletionRecord, None, None]:
+    token = _current_record.set(record)
+    try:
+        yield record
+    except Exception as e:
+        record.error = type(e).__name__
+        raise
+    finally:
+        _current_record.reset(token)
+        _finish_record(record, hooks)
+
+
+def _instrumented_stream[T](
+    stream: Iterator[T], record: CompletionRecord, hooks: list[CompletionHook]
+) -> Generator[T, None, None]:
+    # The record is only made current while the stream advances, never across a `yield`
+    try:
+        while True:
+            token = _current_record.set(record)
+            try:
+                partial = next(stream)
+            except StopIteration:
+                return
+            finally:
+                _current_record.reset(token)
+            if record.time_to_first_byte is None:
+                record.time_to_first_byte = time.perf_counter() - record._started
+            yield partial
+    except Exception as e:
+        record.error = type(e).__name__
+        raise
+    finally:
+        _finish_record(record, hooks)
+
+
+async def _ainstrumented_stream[T](
+    stream: AsyncIterator[T], record: CompletionRecord, hooks: list[CompletionHook]
+) -> AsyncGenerator[T, None]:
+    try:
+        while True:
+            token = _current_record.set(record)
+            try:
+                partial = await anext(stream)
+            except StopAsyncIteration:
+                return
+            finally:
+                _current_record.reset(token)
+            if record.time_to_first_byte is None:
+                record.time_to_first_byte = time.perf_counter() - record._started
+            yield partial
+    except Exception as e:
+        record.error = type(e).__name__
+        raise
+    finally:
+        _finish_record(record, hooks)
+
+
+def _percentile(values: list[float], quantile: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(quantile * len(ordered)))]
+
+
+class CompletionMetrics:
+    """In-process hook that keeps the last `max_samples` records per response model.
+
+    Pass an instance in `hooks=[...]` and call `summary()` or `dump()` whenever needed.
+    """
+
+    def __init__(self, max_samples: int = 10_000) -> None:
+        self._records: defaultdict[str, deque[CompletionRecord]] = defaultdict(lambda: deque(maxlen=max_samples))
+        self._lock = threading.Lock()
+
+    def __call__(self, record: CompletionRecord) -> None:
+        with self._lock:
+            self._records[record.response_model].append(record)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            snapshot = {name: list(records) for name, records in self._records.items()}
+
+        summary = {}
+        for name, records in snapshot.items():
+            latencies = [record.latency for record in records if not record.cached]
+            first_bytes = [record.time_to_first_byte for record in records if record.time_to_first_byte is not None]
+            summary[name] = {
+                "calls": len(records),
+                "errors": sum(record.error is not None for record in records),
+                "cache_hits": sum(record.cached for record in records),
+                "retries": sum(record.retries for record in records),
+                "validation_failures": sum(record.validation_failures for record in records),
+                "prompt_tokens": sum(record.prompt_tokens for record in records),
+                "completion_tokens": sum(record.completion_tokens for record in records),
+                "latency_p50": _percentile(latencies, 0.50),
+                "latency_p95": _percentile(latencies, 0.95),
+                "latency_p99": _percentile(latencies, 0.99),
+                "ttfb_p50": _percentile(first_bytes, 0.50),
+                "ttfb_p95": _percentile(first_bytes, 0.95),
+            }
+        return summary
+
+    def dump(self) -> str:
+        lines = []
+        for name, stats in self.summary().items():
+            lines.append(
+                f"{name}: {stats['calls']} calls, {stats['errors']} errors, {stats['cache_hits']} cache hits, "
+                f"{stats['retries']} retries, {stats['validation_failures']} validation failures | "
+                f"latency p50={stats['latency_p50']:.3f}s p95={stats['latency_p95']:.3f}s "
+                f"p99={stats['latency_p99']:.3f}s | ttfb p50={stats['ttfb_p50']:.3f}s | "
+                f"tokens {stats['prompt_tokens']} in / {stats['completion_tokens']} out"
+            )
+        return "\n".join(lines)
+
+
+class OpenTelemetryHook:
+    """Emits one client span per completion following the GenAI semantic conventions.
+
+    Requires `opentelemetry-api`; spans go to whatever tracer provider the application configured.
+    """
+
+    def __init__(self, tracer: Any = None) -> None:
+        from opentelemetry import trace
+
+        self._trace = trace
+        self.tracer = tracer or trace.get_tracer("llm_factory")
+
+    def __call__(self, record: CompletionRecord) -> None:
+        start_time = int(record.started_at * 1e9)
+        attributes = {
+            "gen_ai.system": record.provider,
+            "gen_ai.request.model": record.model,
+            "gen_ai.usage.input_tokens": record.prompt_tokens,
+            "gen_ai.usage.output_tokens": record.completion_tokens,
+            "llm_factory.response_model": record.response_model,
+            "llm_factory.retries": record.retries,
+            "llm_factory.validation_failures": record.validation_failures,
+            "llm_factory.cached": record.cached,
+            "llm_factory.rate_limit_wait": record.rate_limit_wait,
+        }
+        if record.time_to_first_byte is not None:
+            attributes["llm_factory.time_to_first_byte"] = record.time_to_first_byte
+        if record.parse_time is not None:
+            attributes["llm_factory.parse_time"] = record.parse_time
+
+        span = self.tracer.start_span(
+            f"chat {record.model}",
+            kind=self._trace.SpanKind.CLIENT,
+            start_time=start_time,
+            attributes=attributes,
+        )
+        if record.error:
+            span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, record.error))
+        span.end(end_time=start_time + int(record.latency * 1e9))
+
+
+@dataclass
+class BatchStats:
+    total: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def items_per_second(self) -> float:
+        return self.total / self.elapsed if self.elapsed else 0.0
+
+
+@dataclass
+class BatchResult[T: BaseModel]:
+    """Outcome of a batched completion. `results` and `errors` are aligned with the input order."""
+
+    results: list[T | None]
+    errors: list[BaseException | None]
+    stats: BatchStats = field(default_factory=BatchStats)
+
+    @property
+    def failures(self) -> dict[int, BaseException]:
+        return {index: error for index, error in enumerate(self.errors) if error is not None}
+
+
+def _batch_result[T: BaseModel](outcomes: list[T | BaseException], elapsed: float) -> BatchResult[T]:
+    # BaseException, since a cancelled task's outcome is a CancelledError
+    errors = [outcome if isinstance(outcome, BaseException) else None for outcome in outcomes]
+    failed = sum(error is not None for error in errors)
+    return BatchResult(
+        results=[None if isinstance(outcome, BaseException) else outcome for outcome in outcomes],
+        errors=errors,
+        stats=BatchStats(total=len(outcomes), succeeded=len(outcomes) - failed, failed=failed, elapsed=elapsed),
+    )
+
+
+def _completion_params(
+    settings: LLMSettings,
+    response_model: type[BaseModel],
+    messages: list[dict[str, str]],
+    kwargs: dict[str, Any],
+) -> dict[str, Any]:
+    return {
+        "model": kwargs.get("model") or settings.default_model,
+        "temperature": kwargs.get("temperature", settings.temperature),
+        "max_retries": kwargs.get("max_retries", settings.max_retries),
+        "max_tokens": kwargs.get("max_tokens", settings.max_tokens),
+        "response_model": response_model,
+        "messages": messages,
+    }
 
 
 class LLMFactory:
-    def __init__(self, provider: LLMProviders) -> None:
+    def __init__(
+        self,
+        provider: LLMProviders,
+        cache: CompletionCache | None = None,
+        rate_limiter: RateLimiter | None = None,
+        hooks: list[CompletionHook] | None = None,
+    ) -> None:
         self.provider: LLMProviders = provider
-        self.settings: LLMSettings = getattr(get_settings(), provider)
+        self.settings: LLMSettings = _provider_settings(provider)
         self.client: instructor.Instructor = self._initialize_client()
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.hooks = hooks or []
 
     def _initialize_client(self) -> instructor.Instructor:
         client_initializers: ClientInitializer = {
-            "openai": lambda settings: instructor.from_openai(OpenAI(api_key=settings.api_key)),
-            "anthropic": lambda settings: instructor.from_anthropic(Anthropic(api_key=settings.api_key)),
-            "ollama": lambda settings: instructor.from_openai(
-                OpenAI(base_url=settings.base_url, api_key=settings.api_key),  # type: ignore Ollama setting will have `settings.base_url`
-                mode=instructor.Mode.JSON,
-            ),
+            "openai": _openai_client,
+            "anthropic": _anthropic_client,
+            "ollama": _ollama_client,
         }
 
         initializer = client_initializers.get(self.provider)
         if initializer:
-            return initializer(self.settings)
+            client = initializer(self.settings)
+            _register_instrumentation(client)
+            return client
 
         err_msg = f"Unsupported LLM provider: {self.provider}"
         raise ValueError(err_msg)
 
-    def create_completion[T: type[BaseModel]](
+    def _acquire_rate_limit(self, completion_params: dict[str, Any]) -> float:
+        if not self.rate_limiter:
+            return 0.0
+        model, messages = completion_params["model"], completion_params["messages"]
+        tokens = estimate_tokens(model, messages, completion_params["max_tokens"])
+        return self.rate_limiter.acquire(self.provider, model, tokens)
+
+    @overload
+    def create_completion[T: BaseModel](
+        self,
+        response_model: type[T],
+        messages: list[dict[str, str]],
+        stream: LiteralFalse = False,
+        **kwargs: Any,
+    ) -> T: ...
+
+    @overload
+    def create_completion[T: BaseModel](
         self,
-        response_model: T,
+        response_model: type[T],
         messages: list[dict[str, str]],
+        stream: LiteralTrue,
+        **kwargs: Any,
+    ) -> Generator[T, None, None]: ...
+
+    def create_completion[T: BaseModel](
+        self,
+        response_model: type[T],
+        messages: list[dict[str, str]],
+        stream: bool = False,
         **kwargs: Any,
     ) -> T | Generator[T, None, None]:
-        completion_params = {
-            "model": kwargs.get("model") or self.settings.default_model,
-            "temperature": kwargs.get("temperature", self.settings.temperature),
-            "max_retries": kwargs.get("max_retries", self.settings.max_retries),
-            "max_tokens": kwargs.get("max_tokens", self.settings.max_tokens),
-            "response_model": response_model,
-            "messages": messages,
+        completion_params = _completion_params(self.settings, response_model, messages, kwargs)
+
+        record = _new_record(self.provider, completion_params)
+
+        # Partial models are yielded as fields arrive; streams bypass the cache
+        if stream:
+            record.rate_limit_wait = self._acquire_rate_limit(completion_params)
+            stream_iter = self.client.chat.completions.create_partial(**completion_params)  # type: ignore
+            return _instrumented_stream(stream_iter, record, self.hooks)
+
+        with _instrumented(record, self.hooks):
+            cache_key = _cache_key(self.provider, completion_params) if self.cache else None
+            if cache_key and (cached := self.cache.get(cache_key)) is not None:  # type: ignore `cache_key` implies a cache
+                record.cached = True
+                return response_model.model_validate_json(cached)
+
+            record.rate_limit_wait = self._acquire_rate_limit(completion_params)
+            response = self.client.chat.completions.create(**completion_params)  # type: ignore Instructor needs to improve type hints
+            if cache_key:
+                self.cache.set(cache_key, response.model_dump_json())  # type: ignore
+            return response
+
+    def create_completions_batch[T: BaseModel](
+        self,
+        response_model: type[T],
+        list_of_messages: list[list[dict[str, str]]],
+        max_concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+        **kwargs: Any,
+    ) -> BatchResult[T]:
+        def complete(messages: list[dict[str, str]]) -> T | Exception:
+            try:
+                return self.create_completion(response_model, messages, **kwargs)
+            except Exception as e:  # noqa: BLE001 Failures are reported per item
+                return e
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            outcomes = list(executor.map(complete, list_of_messages))
+
+        return _batch_result(outcomes, time.perf_counter() - start)
+
+
+def _failover_error_types() -> tuple[type[BaseException], ...]:
+    # An SDK that was never imported cannot have raised, so there is no need to import it here
+    error_types: list[type[BaseException]] = [TimeoutError]
+    for module_name, class_name in (
+        ("httpx", "TimeoutException"),
+        ("openai", "APIConnectionError"),
+        ("anthropic", "APIConnectionError"),
+    ):
+        if module := sys.modules.get(module_name):
+            error_types.append(getattr(module, class_name))
+    return tuple(error_types)
+
+
+def _is_failover_error(error: BaseException | None) -> bool:
+    error_types = _failover_error_types()
+    # Instructor and tenacity wrap provider errors, so walk the whole exception chain
+    while error is not None:
+        if isinstance(error, error_types):
+            return True
+        status_code = getattr(error, "status_code", None)
+        if isinstance(status_code, int) and status_code >= 500:
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class FailoverLLMFactory:
+    """Tries an ordered list of providers, failing over on timeouts, connection errors and 5xx responses.
+
+    With `hedge=True`, a duplicate request is sent to the next provider once the in-flight one
+    exceeds its p95 latency (or `hedge_delay` seconds until `HEDGE_MIN_SAMPLES` calls were seen);
+    whichever returns first wins. Each provider uses its own `default_model`, so do not pass `model`.
+    """
+
+    def __init__(
+        self,
+        providers: list[LLMProviders],
+        cache: CompletionCache | None = None,
+        rate_limiter: RateLimiter | None = None,
+        hooks: list[CompletionHook] | None = None,
+        hedge: bool = False,
+        hedge_delay: float = 2.0,
+        max_workers: int = 32,
+    ) -> None:
+        if not providers:
+            err_msg = "At least one LLM provider is required"
+            raise ValueError(err_msg)
+
+        self.factories = [
+            LLMFactory(provider, cache=cache, rate_limiter=rate_limiter, hooks=hooks) for provider in providers
+        ]
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self._latencies = [deque[float](maxlen=500) for _ in providers]
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def _hedge_after(self, index: int) -> float:
+        latencies = list(self._latencies[index])
+        if len(latencies) < HEDGE_MIN_SAMPLES:
+            return self.hedge_delay
+        import statistics
+
+        return statistics.quantiles(latencies, n=20)[18]
+
+    def _timed_completion[T: BaseModel](
+        self,
+        index: int,
+        response_model: type[T],
+        messages: list[dict[str, str]],
+        kwargs: dict[str, Any],
+    ) -> T:
+        start = time.perf_counter()
+        response = self.factories[index].create_completion(response_model, messages, **kwargs)
+        self._latencies[index].append(time.perf_counter() - start)
+        return response
+
+    def create_completion[T: BaseModel](
+        self,
+        response_model: type[T],
+        messages: list[dict[str, str]],
+        **kwargs: Any,
+    ) -> T:
+        # Provider index and launch time of each in-flight request
+        pending: dict[Future[T], tuple[int, float]] = {}
+        next_index = 0
+        last_error: Exception | None = None
+
+        def launch() -> None:
+            nonlocal next_index
+            future = self._executor.submit(self._timed_completion, next_index, response_model, messages, kwargs)
+            pending[future] = (next_index, time.monotonic())
+            next_index += 1
+
+        launch()
+        while pending:
+            can_hedge = self.hedge and len(pending) == 1 and next_index < len(self.factories)
+            timeout = None
+            if can_hedge:
+                # Hedge once the in-flight request has run for its p95 since its own launch
+                index, launched = next(iter(pending.values()))
+                timeout = max(0.0, self._hedge_after(index) - (time.monotonic() - launched))
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                launch()
+                continue
+
+            for future in done:
+                pending.pop(future)
+                try:
+                    # Losing hedged requests are left to finish in the background
+                    return future.result()
+                except Exception as e:
+                    if not _is_failover_error(e):
+                        raise
+                    last_error = e
+
+            if not pending and next_index < len(self.factories):
+                launch()
+
+        raise last_error  # type: ignore Every provider failed, so an error was recorded
+
+
+class AsyncLLMFactory:
+    """Async counterpart of `LLMFactory` for high-concurrency workers.
+
+    Every factory for the same provider and credentials running on the same event loop shares
+    one keep-alive HTTP connection pool, and all factories for a provider draw from one
+    semaphore per loop. The provider cap comes from `provider_concurrency` if set there,
+    otherwise from the first factory created for the provider; a factory created with a lower
+    `max_concurrency` is additionally held to its own cap. Pools and semaphores are created on
+    first use in a loop, so each `asyncio.run()` gets fresh ones; close the pool with
+    `await factory.aclose()` or `async with factory:` before the loop ends.
+    """
+
+    # Process-wide in-flight cap per provider; set entries before creating factories to override
+    provider_concurrency: ClassVar[dict[LLMProviders, int]] = {}
+
+    _pools: ClassVar[
+        weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop,
+            dict[tuple[LLMProviders, str | None, str | None], tuple[instructor.AsyncInstructor, httpx.AsyncClient]],
+        ]
+    ] = weakref.WeakKeyDictionary()
+    _provider_semaphores: ClassVar[
+        weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[LLMProviders, asyncio.Semaphore]]
+    ] = weakref.WeakKeyDictionary()
+    _pools_lock = threading.Lock()
+
+    def __init__(
+        self,
+        provider: LLMProviders,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        cache: CompletionCache | None = None,
+        rate_limiter: RateLimiter | None = None,
+        hooks: list[CompletionHook] | None = None,
+    ) -> None:
+        if provider not in ("openai", "anthropic", "ollama"):
+            err_msg = f"Unsupported LLM provider: {provider}"
+            raise ValueError(err_msg)
+
+        self.provider: LLMProviders = provider
+        self.settings: LLMSettings = _provider_settings(provider)
+        with self._pools_lock:
+            self.provider_cap = self.provider_concurrency.setdefault(provider, max_concurrency)
+        self.max_concurrency = min(max_concurrency, self.provider_cap)
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.hooks = hooks or []
+        self._semaphores: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    @property
+    def _pool_key(self) -> tuple[LLMProviders, str | None, str | None]:
+        return (self.provider, self.settings.api_key, getattr(self.settings, "base_url", None))
+
+    @property
+    def client(self) -> instructor.AsyncInstructor:
+        """The shared client for the running event loop, created on first use."""
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        with self._pools_lock:
+            pools = self._pools.setdefault(loop, {})
+            if self._pool_key not in pools:
+                pools[self._pool_key] = self._initialize_client()
+            return pools[self._pool_key][0]
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        """The provider-wide concurrency cap for the running event loop."""
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        with self._pools_lock:
+            semaphores = self._provider_semaphores.setdefault(loop, {})
+            if self.provider not in semaphores:
+                semaphores[self.provider] = asyncio.Semaphore(self.provider_cap)
+            return semaphores[self.provider]
+
+    @asynccontextmanager
+    async def _concurrency_slot(self) -> AsyncIterator[None]:
+        """Hold a provider slot, and a slot of this factory's own cap if it is lower."""
+        import asyncio
+
+        if self.max_concurrency >= self.provider_cap:
+            async with self.semaphore:
+                yield
+            return
+        loop = asyncio.get_running_loop()
+        if loop not in self._semaphores:
+            self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphores[loop], self.semaphore:
+            yield
+
+    def _initialize_client(self) -> tuple[instructor.AsyncInstructor, httpx.AsyncClient]:
+        client_initializers: AsyncClientInitializer = {
+            "openai": _async_openai_client,
+            "anthropic": _async_anthropic_client,
+            "ollama": _async_ollama_client,
         }
 
-        return self.client.chat.completions.create(**completion_params)  # type: ignore Instructor needs to improve type hints
+        import httpx
+
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.provider_cap,
+                max_keepalive_connections=self.provider_cap,
+            ),
+            timeout=httpx.Timeout(600.0, connect=5.0),
+        )
+        client = client_initializers[self.provider](self.settings, http_client)
+        _register_instrumentation(client)
+        return client, http_client
+
+    async def aclose(self) -> None:
+        """Close the running loop's connection pool shared by factories with the same credentials."""
+        import asyncio
+
+        with self._pools_lock:
+            pool = self._pools.get(asyncio.get_running_loop(), {}).pop(self._pool_key, None)
+        if pool is not None:
+            await pool[1].aclose()
+
+    async def __aenter__(self) -> AsyncLLMFactory:
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.aclose()
+
+    async def _aacquire_rate_limit(self, completion_params: dict[str, Any]) -> float:
+        # Waiting happens before taking a concurrency slot so queued calls do not hold connections
+        if not self.rate_limiter:
+            return 0.0
+        model, messages = completion_params["model"], completion_params["messages"]
+        tokens = estimate_tokens(model, messages, completion_params["max_tokens"])
+        return await self.rate_limiter.aacquire(self.provider, model, tokens)
+
+    @overload
+    async def acreate_completion[T: BaseModel](
+        self,
+        response_model: type[T],
+        messages: list[dict[str, str]],
+        stream: LiteralFalse = False,
+        **kwargs: Any,
+    ) -> T: ...
+
+    @overload
+    async def acreate_completion[T: BaseModel](
+        self,
+        response_model: type[T],
+        messages: list[dict[str, str]],
+        stream: LiteralTrue,
+        **kwargs: Any,
+    ) -> AsyncGenerator[T, None]: ...
+
+    async def acreate_completion[T: BaseModel](
+        self,
+        response_model: type[T],
+        messages: list[dict[str, str]],
+        stream: bool = False,
+        **kwargs: Any,
+    ) -> T | AsyncGenerator[T, None]:
+        completion_params = _completion_params(self.settings, response_model, messages, kwargs)
+
+        record = _new_record(self.provider, completion_params)
+
+        if stream:
+            return self._astream_completion(completion_params, record)
+
+        with _instrumented(record, self.hooks):
+            cache_key = _cache_key(self.provider, completion_params) if self.cache else None
+            if cache_key and (cached := self.cache.get(cache_key)) is not None:  # type: ignore `cache_key` implies a cache
+                record.cached = True
+                return response_model.model_validate_json(cached)
+
+            record.rate_limit_wait = await self._aacquire_rate_limit(completion_params)
+            async with self._concurrency_slot():
+                response = await self.client.chat.completions.create(**completion_params)  # type: ignore Instructor needs to improve type hints
+            if cache_key:
+                self.cache.set(cache_key, response.model_dump_json())  # type: ignore
+            return response
+
+    async def _astream_completion(
+        self, completion_params: dict[str, Any], record: CompletionRecord
+    ) -> AsyncGenerator[Any, None]:
+        record.rate_limit_wait = await self._aacquire_rate_limit(completion_params)
+        # The concurrency slot is held until the stream is exhausted or closed
+        async with self._concurrency_slot():
+            stream = self.client.chat.completions.create_partial(**completion_params)  # type: ignore
+            async for partial in _ainstrumented_stream(stream, record, self.hooks):
+                yield partial
+
+    async def acreate_completions_batch[T: BaseModel](
+        self,
+        response_model: type[T],
+        list_of_messages: list[list[dict[str, str]]],
+        max_concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+        **kwargs: Any,
+    ) -> BatchResult[T]:
+        import asyncio
+
+        batch_semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def complete(messages: list[dict[str, str]]) -> T:
+            async with batch_semaphore:
+                return await self.acreate_completion(response_model, messages, **kwargs)
+
+        start = time.perf_counter()
+        outcomes = await asyncio.gather(*(complete(messages) for messages in list_of_messages), return_exceptions=True)
+
+        return _batch_result(list(outcomes), time.perf_counter() - start)